@@ -16,4 +16,4 @@ if len(_items) > 1:
 	VERSION_STATUS = _items[1]
 __version__ = VERSION
 
-from arff_utils import ARFF
+from .arff_utils import ARFF
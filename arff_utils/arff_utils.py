@@ -1,9 +1,1799 @@
 # -*- coding: utf-8 -*-
 __author__ = 'Ralph'
 
-import arff
-import numpy as np
-import pandas as pd
+import glob
+import hashlib
+import importlib
+import io
+import itertools
+import json
+import mmap
+import numbers
+import os
+import re
+import shutil
+import struct
+import sys
+
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+
+class _LazyModule(object):
+    """
+    Imports a module on first use. Numpy, Pandas and liac-arff take a long
+    time to import, while many operations, e.g., reading the header of a
+    file or counting its rows, do not need them at all.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        value = getattr(self._module, attribute)
+        setattr(self, attribute, value)
+        return value
+
+
+arff = _LazyModule('arff')
+multiprocessing = _LazyModule('multiprocessing')
+np = _LazyModule('numpy')
+pd = _LazyModule('pandas')
+
+
+def _shared_memory():
+    """
+    Returns the shared_memory and resource_tracker modules of the
+    multiprocessing package, or None if they are not available (Python
+    versions before 3.8).
+    :return: Tuple (shared_memory, resource_tracker) or None
+    """
+    try:
+        from multiprocessing import resource_tracker, shared_memory
+    except ImportError:
+        return None
+    return shared_memory, resource_tracker
+
+NUMERIC_TYPES = ['NUMERIC', 'REAL', 'INTEGER']
+CHUNK_SIZE = 10000
+MAX_DICTIONARY_SIZE = 32767
+QUANTILE_SAMPLE_SIZE = 10000
+ROW_GROUP_SIZE = 1000000
+BINARY_MAGIC = b'ARFFB\x00\x01\x00'
+BINARY_ALIGNMENT = 64
+DEFAULT_DATE_FORMAT = "yyyy-MM-dd'T'HH:mm:ss"
+MISSING_HASH = 0x6a09e667f3bcc908
+RANGE_SIZE = 64 * 1024 * 1024
+
+_RE_NOMINAL_ATTRIBUTE = re.compile(r'^(@attribute\s+(?:"[^"]*"|\'[^\']*\'|[^\s{]+))\s*\{.*\}$', re.IGNORECASE)
+_RE_DATE_ATTRIBUTE = re.compile(r'^(@attribute\s+(?:".*"|\'.*\'|\S+))\s+date(?:\s+(.+))?$', re.IGNORECASE)
+# Longer patterns come first. Single-letter fields are written zero-padded.
+# Milliseconds (SSS) are parsed as fractions of a second and written with
+# three digits. S and SS are not supported because Java reads them as a
+# number of milliseconds, not as a fraction. Time zones (Z, X and z) are
+# parsed into UTC and written as UTC offsets (Z for X) or names
+_DATE_PATTERNS = [
+    ('yyyy', '%Y'), ('yy', '%y'), ('y', '%Y'), ('MMMM', '%B'), ('MMM', '%b'), ('MM', '%m'), ('M', '%m'),
+    ('dd', '%d'), ('d', '%d'), ('EEEE', '%A'), ('EEE', '%a'), ('HH', '%H'), ('H', '%H'), ('hh', '%I'),
+    ('h', '%I'), ('mm', '%M'), ('m', '%M'), ('ss', '%S'), ('s', '%S'), ('SSS', '%f'), ('a', '%p'),
+    ('XXX', '%z'), ('XX', '%z'), ('X', '%z'), ('Z', '%z'), ('z', '%Z')
+]
+_DATE_OUTPUT_PATTERNS = {'XXX': 'Z', 'XX': 'Z', 'X': 'Z'}
+_ISO_DATE_FORMATS = {
+    '%Y-%m-%d': 'D',
+    '%Y-%m-%dT%H:%M:%S': 's',
+    '%Y-%m-%d %H:%M:%S': 's',
+    '%Y-%m-%dT%H:%M:%S.%f': 'ms',
+    '%Y-%m-%d %H:%M:%S.%f': 'ms'
+}
+_MILLISECONDS_MARKER = '\x01'
+_date_formats = {}
+
+
+def _read_header_lines(f):
+    """
+    Reads lines from the given file up to and including the @data line. We
+    use readline() instead of iterating over the file so that the file is
+    positioned exactly at the start of the data section afterwards.
+    :param f: File object (text or binary)
+    :return: List of header lines
+    """
+    lines = []
+    while True:
+        line = f.readline()
+        if not line:
+            break
+        lines.append(line)
+        if line.strip()[:5].upper() in ['@DATA', b'@DATA']:
+            return lines
+    raise RuntimeError('No @data section found in ' + str(f.name))
+
+
+def _patch_date_attributes(header_lines):
+    """
+    Replaces DATE by STRING in the attribute declarations of the given
+    header lines because liac-arff does not support dates. The original
+    types are returned so they can be restored after decoding.
+    :param header_lines: Header lines
+    :return: Tuple (patched header lines, dictionary of index to type)
+    """
+    lines = []
+    date_types = {}
+    index = 0
+    for line in header_lines:
+        stripped = line.strip()
+        if stripped.upper().startswith('@ATTRIBUTE'):
+            match = _RE_DATE_ATTRIBUTE.match(stripped)
+            if match:
+                date_types[index] = 'DATE' if match.group(2) is None else 'DATE ' + match.group(2).strip()
+                line = match.group(1) + ' STRING\n'
+            index += 1
+        lines.append(line)
+    return lines, date_types
+
+
+def _load(f, return_type=None):
+    """
+    Loads ARFF file with liac-arff, including DATE attributes. Their values
+    are returned as strings.
+    :param f: File object
+    :param return_type: liac-arff return type (default arff.DENSE or arff.DENSE_GEN)
+    :return: Data dictionary
+    """
+    return _decode(_read_header_lines(f), f, return_type)
+
+
+def _decode(header_lines, lines, return_type=None, nominal_as_string=False):
+    """
+    Decodes header lines and data lines with liac-arff. If nominal_as_string
+    is set, nominal values are not checked against their labels but returned
+    as plain strings, so that unknown values can be counted instead of
+    raising an error.
+    :param header_lines: Header lines
+    :param lines: Data lines
+    :param return_type: liac-arff return type (default arff.DENSE or arff.DENSE_GEN)
+    :param nominal_as_string: Decode nominal values as strings
+    :return: Data dictionary
+    """
+    if return_type is None:
+        return_type = arff.DENSE
+    header_lines, date_types = _patch_date_attributes(header_lines)
+    if nominal_as_string:
+        attributes = arff.loads(''.join(header_lines))['attributes']
+        patched = []
+        for line in header_lines:
+            match = _RE_NOMINAL_ATTRIBUTE.match(line.strip())
+            patched.append(match.group(1) + ' STRING\n' if match else line)
+        header_lines = patched
+    data = arff.load(itertools.chain(header_lines, lines), return_type=return_type)
+    if nominal_as_string:
+        data['attributes'] = attributes
+    for i in date_types:
+        data['attributes'][i] = (data['attributes'][i][0], date_types[i])
+    return data
+
+
+def _text(line):
+    """
+    Decodes line read from a binary file (Python 3 only).
+    :param line: Line
+    :return: Decoded line
+    """
+    if isinstance(line, str):
+        return line
+    return line.decode('utf-8')
+
+
+def _data_ranges(file_name, num_ranges=None):
+    """
+    Splits the data section of an ARFF file in byte ranges of about equal
+    size, e.g., to process them in parallel. A range contains the lines
+    that start inside of it (see _load_range()). If the number of ranges
+    is not given, ranges of about RANGE_SIZE bytes are used, so that the
+    ranges only depend on the file and not on the number of workers.
+    :param file_name: File name
+    :param num_ranges: Number of ranges
+    :return: List of (start, end) tuples
+    """
+    with open(file_name, 'rb') as f:
+        _read_header_lines(f)
+        start = f.tell()
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+    if num_ranges is None:
+        num_ranges = max(1, -(-(end - start) // RANGE_SIZE))
+    bounds = [start + (end - start) * i // num_ranges for i in range(num_ranges + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(num_ranges)]
+
+
+def _iter_range_chunks(file_name, start, end, chunk_size=CHUNK_SIZE):
+    """
+    Returns column data dictionaries of at most chunk_size rows each for
+    a byte range of an ARFF file (see _data_ranges()).
+    :param file_name: File name
+    :param start: Start of byte range
+    :param end: End of byte range
+    :param chunk_size: Maximum number of rows per chunk
+    :return: Generator of column data dictionaries
+    """
+    data = _load_range(file_name, start, end)
+    while True:
+        rows = list(itertools.islice(data['data'], chunk_size))
+        if len(rows) == 0:
+            break
+        yield ARFF.to_columns(dict(data, data=rows))
+
+
+def _load_range(file_name, start, end, nominal_as_string=False):
+    """
+    Loads the rows of an ARFF file whose lines start in the given byte range
+    of the file. The rows are returned as a generator (see read_chunks()).
+    :param file_name: File name
+    :param start: Start of range
+    :param end: End of range
+    :param nominal_as_string: Decode nominal values as strings (see _decode())
+    :return: Data dictionary
+    """
+    f = open(file_name, 'rb')
+    header_lines = [_text(line) for line in _read_header_lines(f)]
+    if start > f.tell():
+        # Skip the remainder of the line that started before our range
+        f.seek(start - 1)
+        f.readline()
+
+    def lines():
+        try:
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                yield _text(line)
+        finally:
+            f.close()
+
+    return _decode(header_lines, lines(), arff.DENSE_GEN, nominal_as_string)
+
+
+def _dump(data, f):
+    """
+    Writes data dictionary to file with liac-arff, including DATE attributes.
+    Their values are expected to be strings in the declared format.
+    :param data: Data dictionary
+    :param f: File object
+    """
+    attributes = data['attributes']
+    date_types = dict((i, attributes[i][1]) for i in range(len(attributes)) if _is_date(attributes[i][1]))
+    if len(date_types) == 0:
+        arff.dump(data, f)
+        return
+    obj = dict(data)
+    obj['attributes'] = [(attributes[i][0], 'STRING') if i in date_types else attributes[i]
+                         for i in range(len(attributes))]
+    index = 0
+    for line in arff.ArffEncoder().iter_encode(obj):
+        if line.upper().startswith('@ATTRIBUTE'):
+            if index in date_types:
+                line = line[:-len('STRING')] + date_types[index]
+            index += 1
+        f.write(line + u'\n')
+
+
+def _is_date(attribute_type):
+    """
+    Checks whether given attribute type is a DATE type.
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :return: True/False
+    """
+    return not type(attribute_type) is list and attribute_type.upper().split(None, 1)[0] == 'DATE'
+
+
+def _date_format(attribute_type, output=False):
+    """
+    Translates the Java-style date format of a DATE attribute, e.g.,
+    'DATE "yyyy-MM-dd HH:mm:ss"', to a strftime() format. The format to
+    write dates with differs for ISO-8601 time zones (X), which are written
+    as Z for UTC. Translations are cached because they are needed for every
+    chunk of data.
+    :param attribute_type: DATE attribute type
+    :param output: Return the format to write dates with
+    :return: strftime() format
+    """
+    if (attribute_type, output) in _date_formats:
+        return _date_formats[(attribute_type, output)]
+    parts = attribute_type.split(None, 1)
+    java_format = DEFAULT_DATE_FORMAT if len(parts) == 1 else parts[1].strip('"\'')
+    result = ''
+    i = 0
+    while i < len(java_format):
+        char = java_format[i]
+        if char == "'":
+            # Quoted literal text, where '' is a single quote
+            end = java_format.find("'", i + 1)
+            if end < 0:
+                raise RuntimeError('Unterminated quote in date format ' + java_format)
+            result += "'" if end == i + 1 else java_format[i + 1:end].replace('%', '%%')
+            i = end + 1
+        elif char.isalpha():
+            for pattern, replacement in _DATE_PATTERNS:
+                if java_format.startswith(pattern, i):
+                    result += _DATE_OUTPUT_PATTERNS.get(pattern, replacement) if output else replacement
+                    i += len(pattern)
+                    break
+            else:
+                raise RuntimeError('Unsupported date format ' + java_format)
+        else:
+            result += '%%' if char == '%' else char
+            i += 1
+    _date_formats[(attribute_type, output)] = result
+    return result
+
+
+def _has_zone(date_format):
+    """
+    Checks whether strftime() format of a DATE attribute contains a time
+    zone. Such dates are converted to UTC when parsed.
+    :param date_format: strftime() format
+    :return: True/False
+    """
+    date_format = date_format.replace('%%', '')
+    return '%z' in date_format or '%Z' in date_format
+
+
+def _is_nat(column):
+    """
+    Returns mask of missing values (NaT) in datetime64 column.
+    :param column: datetime64 column
+    :return: Boolean array
+    """
+    return column.view(np.int64) == np.iinfo(np.int64).min
+
+
+def _parse_dates(attribute_type, values):
+    """
+    Parses date strings of a DATE attribute into a datetime64[ns] array.
+    ISO-8601 dates are parsed directly by Numpy, other formats by Pandas.
+    Both are vectorized. Dates with time zones are converted to UTC.
+    :param attribute_type: DATE attribute type
+    :param values: Date strings (None for missing values)
+    :return: datetime64[ns] array
+    """
+    date_format = _date_format(attribute_type)
+    try:
+        if date_format in _ISO_DATE_FORMATS:
+            return _parse_iso_dates(attribute_type, date_format, values)
+        if not _has_zone(date_format):
+            return pd.to_datetime(list(values), format=date_format).values.astype('datetime64[ns]')
+        try:
+            dates = pd.to_datetime(list(values), format=date_format, utc=True)
+        except ValueError:
+            # Older versions of Pandas do not accept utc=True for strings
+            # with time zones, but can convert the parsed dates afterwards
+            dates = pd.to_datetime(pd.to_datetime(list(values), format=date_format), utc=True)
+        return dates.values.astype('datetime64[ns]')
+    except (TypeError, ValueError) as e:
+        raise RuntimeError('Invalid dates for ' + attribute_type + ': ' + unicode(e))
+
+
+def _parse_iso_dates(attribute_type, date_format, values):
+    """
+    Parses ISO-8601 date strings with Numpy (see _parse_dates()). Numpy also
+    accepts other layouts, e.g., dates without time or with a time zone, so
+    the parsed dates are formatted again and compared with the strings.
+    :param attribute_type: DATE attribute type
+    :param date_format: strftime() format, a key of _ISO_DATE_FORMATS
+    :param values: Date strings (None for missing values)
+    :return: datetime64[ns] array
+    """
+    values = np.array(values, dtype=object)
+    present = ~np.equal(values, None)
+    result = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    if not present.any():
+        return result
+    strings = np.array(values[present].tolist(), dtype=unicode)
+    formatted = np.datetime_as_string(np.datetime64(0, 's'), unit=_ISO_DATE_FORMATS[date_format])
+    invalid = np.char.str_len(strings) != len(formatted)
+    if not invalid.any():
+        dates = strings.astype('datetime64[ns]')
+        formatted = np.datetime_as_string(dates, unit=_ISO_DATE_FORMATS[date_format])
+        if ' ' in date_format:
+            formatted = np.char.replace(formatted, 'T', ' ')
+        invalid = formatted != strings
+    if invalid.any():
+        raise RuntimeError('Invalid date ' + strings[invalid][0] + ' for ' + attribute_type)
+    result[present] = dates
+    return result
+
+
+def _format_dates(attribute_type, column):
+    """
+    Formats datetime64 array as date strings of a DATE attribute.
+    :param attribute_type: DATE attribute type
+    :param column: datetime64 array
+    :return: Object array of date strings (None for missing values)
+    """
+    date_format = _date_format(attribute_type)
+    if date_format in _ISO_DATE_FORMATS:
+        strings = np.datetime_as_string(column, unit=_ISO_DATE_FORMATS[date_format])
+        if ' ' in date_format:
+            strings = np.char.replace(strings, 'T', ' ')
+    else:
+        index = pd.DatetimeIndex(column)
+        if _has_zone(date_format):
+            index = index.tz_localize('UTC')
+        date_format = _date_format(attribute_type, output=True)
+        if '%f' not in date_format:
+            strings = index.strftime(date_format)
+        else:
+            # strftime() writes microseconds, so the last three digits are
+            # trimmed after a marker to get milliseconds
+            strings = pd.Index(index.strftime(date_format.replace('%f', '%f' + _MILLISECONDS_MARKER)))
+            strings = strings.str.replace(r'(\d{3})\d{3}' + _MILLISECONDS_MARKER, r'\1', regex=True)
+    result = np.array(strings, dtype=object)
+    result[_is_nat(column)] = None
+    return result
+
+
+def _replace_missing(rows, missing):
+    """
+    Replaces the given missing value representations by None.
+    :param rows: Data rows (modified in place)
+    :param missing: Missing value representation or list of them
+    """
+    if missing is None:
+        return
+    if type(missing) is str:
+        missing = [missing]
+    elif type(missing) is not list:
+        raise RuntimeError('Invalid type for \'missing\' parameter ' + str(type(missing)))
+    for row in rows:
+        for j in range(len(row)):
+            if row[j] in missing:
+                row[j] = None
+
+
+def _check_attributes(attributes1, attributes2):
+    """
+    Checks that two attribute lists correspond exactly, i.e., same names,
+    same types and same nominal values in the same order.
+    :param attributes1: First attribute list
+    :param attributes2: Second attribute list
+    """
+    if not len(attributes1) == len(attributes2):
+        raise RuntimeError('Mismatch number of attributes')
+    for i in range(len(attributes1)):
+        attribute1 = attributes1[i]
+        attribute2 = attributes2[i]
+        if not len(attribute1) == 2:
+            raise RuntimeError('Number of attribute1 items != 2')
+        if not len(attribute2) == 2:
+            raise RuntimeError('Number of attribute2 items != 2')
+        if not unicode(attribute1[0]) == unicode(attribute2[0]):
+            raise RuntimeError('Mismatching names at ' + str(i) + ' (' + attribute1[0] + ' vs ' + attribute2[0] + ')')
+        if type(attribute1[1]) is list and type(attribute2[1]) is list:
+            if not len(attribute1[1]) == len(attribute2[1]):
+                raise RuntimeError('Mismatching number of nominal values at ' + str(i))
+            for j in range(len(attribute1[1])):
+                if not unicode(attribute1[1][j]) == unicode(attribute2[1][j]):
+                    raise RuntimeError('Mismatching nominal values at ('
+                                       + str(i) + ',' + str(j) + ') (' + unicode(attribute1[1][j]) + ' vs ' +
+                                       unicode(attribute2[1][j]) + ')')
+        elif not unicode(attribute1[1]) == unicode(attribute2[1]):
+            raise RuntimeError('Mismatching attribute types (' +
+                               unicode(attribute1[1]) + ' vs ' + unicode(attribute2[1]) + ')')
+
+
+def _is_numeric(attribute_type):
+    """
+    Checks whether given attribute type is numeric.
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :return: True/False
+    """
+    return not type(attribute_type) is list and attribute_type.upper() in NUMERIC_TYPES
+
+
+def _is_integer(attribute_type):
+    """
+    Checks whether given attribute type is INTEGER. Integer attributes are
+    stored as float64 columns like other numeric attributes, but their
+    values are converted back to ints when written or returned as rows.
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :return: True/False
+    """
+    return not type(attribute_type) is list and attribute_type.upper() == 'INTEGER'
+
+
+def _code_dtype(labels):
+    """
+    Returns the smallest signed integer type that can hold the codes of the
+    given nominal labels. Code -1 is reserved for missing values.
+    :param labels: Nominal labels
+    :return: Numpy data type
+    """
+    for dtype in [np.int8, np.int16, np.int32]:
+        if len(labels) <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _to_column(attribute_type, values):
+    """
+    Converts list of attribute values to a Numpy array. Numeric attributes
+    become float64 arrays with NaN for missing values. Nominal attributes
+    become integer codes into their list of labels, with -1 for missing
+    values. Date attributes become datetime64[ns] arrays with NaT for
+    missing values. All other attributes become object arrays.
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :param values: Attribute values
+    :return: Numpy array
+    """
+    if _is_numeric(attribute_type):
+        return np.array(values, dtype=np.float64)
+    if _is_date(attribute_type):
+        return _parse_dates(attribute_type, values)
+    if type(attribute_type) is list:
+        index = dict((label, i) for i, label in enumerate(attribute_type))
+        index[None] = -1
+        try:
+            return np.fromiter((index[value] for value in values), dtype=_code_dtype(attribute_type), count=len(values))
+        except KeyError as e:
+            raise RuntimeError('Invalid nominal value ' + unicode(e.args[0]))
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _encode_strings(column, max_dictionary_size):
+    """
+    Dictionary-encodes string column into integer codes and a list of
+    distinct values (labels), with code -1 for missing values. If there
+    are more than max_dictionary_size distinct values, encoding does not
+    pay off and None is returned.
+    :param column: Object array with string values
+    :param max_dictionary_size: Maximum number of distinct values
+    :return: Tuple (codes, labels) or None
+    """
+    index = {None: -1}
+    labels = []
+    codes = np.empty(len(column), dtype=np.int64)
+    for i in range(len(column)):
+        value = column[i]
+        code = index.get(value)
+        if code is None:
+            if len(labels) == max_dictionary_size:
+                return None
+            code = index[value] = len(labels)
+            labels.append(value)
+        codes[i] = code
+    return codes.astype(_code_dtype(labels)), labels
+
+
+def _encode_string_columns(columns, max_dictionary_size):
+    """
+    Dictionary-encodes all string (object) columns that have at most
+    max_dictionary_size distinct values.
+    :param columns: List of columns
+    :param max_dictionary_size: Maximum number of distinct strings
+    :return: Tuple (columns, dictionaries)
+    """
+    encoded_columns = []
+    dictionaries = []
+    for column in columns:
+        encoded = None
+        if column.dtype == object:
+            encoded = _encode_strings(column, max_dictionary_size)
+        if encoded is None:
+            encoded_columns.append(column)
+            dictionaries.append(None)
+        else:
+            encoded_columns.append(encoded[0])
+            dictionaries.append(encoded[1])
+    return encoded_columns, dictionaries
+
+
+def _from_column(attribute_type, column, labels=None):
+    """
+    Converts Numpy array back to a list of attribute values, replacing
+    NaN by None for numeric columns (and floats by ints for INTEGER
+    columns), codes by their labels for nominal and dictionary-encoded
+    columns and dates by formatted strings.
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :param column: Numpy array
+    :param labels: Labels of nominal or dictionary-encoded column
+    :return: List of values
+    """
+    if labels is not None:
+        return _decode_labels(column, labels).tolist()
+    if _is_date(attribute_type):
+        return _format_dates(attribute_type, column).tolist()
+    if column.dtype.kind == 'f':
+        missing = np.isnan(column)
+        if _is_integer(attribute_type):
+            values = np.full(len(column), None, dtype=object)
+            values[~missing] = column[~missing].astype(np.int64).tolist()
+        else:
+            values = column.astype(object)
+            values[missing] = None
+        return values.tolist()
+    return column.tolist()
+
+
+def _decode_labels(codes, labels):
+    """
+    Converts codes to an object array of labels (None for code -1).
+    :param codes: Integer codes
+    :param labels: Labels
+    :return: Object array
+    """
+    lookup = np.empty(len(labels) + 1, dtype=object)
+    lookup[:-1] = labels
+    return lookup[codes]
+
+
+def _column_labels(data, i):
+    """
+    Returns labels of i-th column of column data dictionary if it is a
+    nominal or dictionary-encoded column, otherwise None.
+    :param data: Column data dictionary
+    :param i: Column index
+    :return: Labels or None
+    """
+    dictionaries = data.get('dictionaries')
+    if dictionaries is not None and dictionaries[i] is not None:
+        return dictionaries[i]
+    attribute_type = data['attributes'][i][1]
+    if type(attribute_type) is list:
+        return attribute_type
+    return None
+
+
+def _to_binary_buffers(attribute_type, column, labels):
+    """
+    Converts column to the buffers stored in a binary ARFF file. Each
+    column has a validity bitmap (packed with np.packbits) and either a
+    'values' buffer (numeric or date), a 'codes' buffer (nominal or dictionary-
+    encoded) or an 'offsets' and 'bytes' buffer holding the UTF-8 encoded
+    strings back-to-back.
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :param column: Column
+    :param labels: Labels of nominal or dictionary-encoded column
+    :return: List of (name, buffer) tuples
+    """
+    if _is_numeric(attribute_type):
+        values = np.ascontiguousarray(column, dtype=np.float64)
+        return [('validity', np.packbits(~np.isnan(values))), ('values', values)]
+    if _is_date(attribute_type):
+        values = np.ascontiguousarray(column, dtype='datetime64[ns]')
+        return [('validity', np.packbits(~_is_nat(values))), ('values', values)]
+    if labels is not None:
+        codes = np.ascontiguousarray(column)
+        return [('validity', np.packbits(codes >= 0)), ('codes', codes)]
+    valid = np.array([value is not None for value in column], dtype=bool)
+    encoded = [b'' if value is None else unicode(value).encode('utf-8') for value in column]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    return [('validity', np.packbits(valid)), ('offsets', offsets), ('bytes', b''.join(encoded))]
+
+
+def _from_binary_buffers(attribute_type, buffers, num_rows, mm):
+    """
+    Converts buffers stored in a binary ARFF file back to a column. Numeric
+    values and codes are returned as read-only views on the memory-mapped
+    file so they are not copied.
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :param buffers: Dictionary of buffer name to [offset, length, dtype]
+    :param num_rows: Number of rows
+    :param mm: Memory-mapped file
+    :return: Column
+    """
+    if 'values' in buffers:
+        return _binary_view(buffers, 'values', mm)
+    if 'codes' in buffers:
+        return _binary_view(buffers, 'codes', mm)
+    return _decode_strings(_binary_strings(buffers, mm), np.arange(num_rows))
+
+
+def _binary_view(buffers, name, mm):
+    """
+    Returns buffer stored in a binary ARFF file as a read-only Numpy view on
+    the memory-mapped file.
+    :param buffers: Dictionary of buffer name to [offset, length, dtype]
+    :param name: Buffer name
+    :param mm: Memory-mapped file
+    :return: Numpy array
+    """
+    offset, length, dtype = buffers[name]
+    dtype = np.dtype(dtype)
+    if length == 0:
+        return np.empty(0, dtype=dtype)
+    return np.frombuffer(mm, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+
+def _binary_strings(buffers, mm):
+    """
+    Returns the buffers of a string column stored in a binary ARFF file
+    without decoding any strings, so they can be decoded for selected rows
+    only (see _decode_strings()).
+    :param buffers: Dictionary of buffer name to [offset, length, dtype]
+    :param mm: Memory-mapped file
+    :return: Tuple (packed validity bitmap, offsets, file, offset of bytes)
+    """
+    return _binary_view(buffers, 'validity', mm), _binary_view(buffers, 'offsets', mm), mm, buffers['bytes'][0]
+
+
+def _decode_strings(strings, rows):
+    """
+    Decodes the strings of the given rows of a string column stored in a
+    binary ARFF file.
+    :param strings: Buffers of string column (see _binary_strings())
+    :param rows: Row numbers
+    :return: Object array of strings (None for missing values)
+    """
+    validity, offsets, mm, start = strings
+    rows = np.asarray(rows, dtype=np.int64)
+    valid = (validity[rows >> 3] >> (7 - (rows & 7)).astype(np.uint8)) & 1
+    column = np.empty(len(rows), dtype=object)
+    for k in np.flatnonzero(valid):
+        i = rows[k]
+        column[k] = mm[start + offsets[i]:start + offsets[i + 1]].decode('utf-8')
+    return column
+
+
+def _open_binary(file_name):
+    """
+    Memory-maps binary ARFF file and reads its footer (see
+    ARFF.write_binary()). Attributes in the footer are converted back to
+    tuples and missing dictionaries are filled in.
+    :param file_name: File name
+    :return: Tuple (memory-mapped file, footer)
+    """
+    magic_size = len(BINARY_MAGIC)
+    with open(file_name, 'rb') as f:
+        # Empty files cannot be memory-mapped
+        size = os.fstat(f.fileno()).st_size
+        if size < 2 * magic_size + 8:
+            raise RuntimeError('File ' + file_name + ' is not a binary ARFF file')
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:magic_size] != BINARY_MAGIC or mm[size - magic_size:] != BINARY_MAGIC:
+        raise RuntimeError('File ' + file_name + ' is not a binary ARFF file')
+    footer_size = struct.unpack('<Q', mm[size - magic_size - 8:size - magic_size])[0]
+    footer_start = size - magic_size - 8 - footer_size
+    footer = json.loads(mm[footer_start:footer_start + footer_size].decode('utf-8'))
+    footer['attributes'] = [(attribute[0], attribute[1]) for attribute in footer['attributes']]
+    footer['dictionaries'] = footer['dictionaries'] or [None] * len(footer['attributes'])
+    return mm, footer
+
+
+def _format_row(row):
+    """
+    Formats data row as a line of ARFF data (without line ending), quoting
+    values where necessary. Missing values (None or NaN) are written as '?'.
+    :param row: Data row
+    :return: Line of ARFF data
+    """
+    values = []
+    for value in row:
+        if value is None or value == u'' or value != value:
+            values.append(u'?')
+        else:
+            values.append(arff.encode_string(unicode(value)))
+    return u','.join(values)
+
+
+def _is_data_frame(data):
+    """
+    Checks whether data is a Pandas data frame without importing Pandas. If
+    Pandas has not been imported yet, data cannot be a data frame.
+    :param data: Data
+    :return: True/False
+    """
+    return 'pandas' in sys.modules and isinstance(data, sys.modules['pandas'].DataFrame)
+
+
+def _rows_for_append(attributes, data):
+    """
+    Converts data to append to rows matching the given attributes and checks
+    that they fit, i.e., same number of values, numbers for numeric
+    attributes, valid nominal values and dates in the declared format. Rows
+    are checked before anything is written, so a bad row cannot corrupt the
+    file.
+    :param attributes: Attributes of the file to append to
+    :param data: Data dictionary, column data dictionary, data frame or list of rows
+    :return: List of rows
+    """
+    if _is_data_frame(data):
+        names = [attribute[0] for attribute in attributes]
+        if not [unicode(name) for name in data.columns] == [unicode(name) for name in names]:
+            raise RuntimeError('Mismatching data frame columns (' + ', '.join(map(unicode, data.columns)) + ')')
+        columns = []
+        for attribute in attributes:
+            column = data[attribute[0]]
+            if _is_date(attribute[1]) and column.dtype.kind == 'M':
+                columns.append(_format_dates(attribute[1], column.values).tolist())
+            elif _is_numeric(attribute[1]) and column.dtype.kind == 'f':
+                # Like ARFF.write(), INTEGER values are written without a
+                # decimal part, also if missing values made the column float
+                columns.append(_from_column(attribute[1], column.values))
+            else:
+                values = np.array(column, dtype=object)
+                values[pd.isnull(values)] = None
+                columns.append(values.tolist())
+        rows = [list(row) for row in zip(*columns)]
+    elif isinstance(data, dict):
+        _check_attributes(attributes, data['attributes'])
+        if 'columns' in data:
+            data = ARFF.from_columns(data)
+        rows = data['data']
+    else:
+        rows = data
+
+    nominals = [(i, set(attributes[i][1])) for i in range(len(attributes)) if type(attributes[i][1]) is list]
+    numerics = [i for i in range(len(attributes)) if _is_numeric(attributes[i][1])]
+    dates = [i for i in range(len(attributes)) if _is_date(attributes[i][1])]
+    for row in rows:
+        if not len(row) == len(attributes):
+            raise RuntimeError('Row has ' + str(len(row)) + ' values, expected ' + str(len(attributes)))
+        for i, labels in nominals:
+            if row[i] is not None and row[i] not in labels:
+                raise RuntimeError('Invalid nominal value ' + unicode(row[i]) + ' for ' + attributes[i][0])
+        for i in numerics:
+            if row[i] is not None and (isinstance(row[i], bool) or not isinstance(row[i], numbers.Real)):
+                raise RuntimeError('Invalid numeric value ' + unicode(row[i]) + ' for ' + attributes[i][0])
+    for i in dates:
+        values = [row[i] for row in rows if row[i] is not None]
+        for value in values:
+            if not isinstance(value, basestring):
+                raise RuntimeError('Invalid date value ' + unicode(value) + ' for ' + attributes[i][0])
+        try:
+            _parse_dates(attributes[i][1], values)
+        except (ValueError, RuntimeError) as e:
+            raise RuntimeError('Invalid date value for ' + attributes[i][0] + ': ' + unicode(e))
+    return rows
+
+
+def _iter_column_chunks(data, chunk_size=CHUNK_SIZE, missing=None):
+    """
+    Returns column data dictionaries of at most chunk_size rows each for
+    the given ARFF file, data dictionary or column data dictionary. Files
+    are read progressively so they do not have to fit in memory.
+    :param data: File name, data dictionary or column data dictionary
+    :param chunk_size: Maximum number of rows per chunk
+    :param missing: List of missing value representations (see read())
+    :return: Generator of column data dictionaries
+    """
+    if isinstance(data, basestring):
+        for chunk in ARFF.read_chunks(data, chunk_size=chunk_size, missing=missing):
+            yield ARFF.to_columns(chunk)
+    elif 'columns' in data:
+        num_rows = len(data['columns'][0]) if len(data['columns']) > 0 else 0
+        for start in range(0, num_rows, chunk_size):
+            chunk = dict(data)
+            chunk['columns'] = [column[start:start + chunk_size] for column in data['columns']]
+            yield chunk
+    else:
+        for start in range(0, len(data['data']), chunk_size):
+            chunk = dict(data)
+            chunk['data'] = data['data'][start:start + chunk_size]
+            yield ARFF.to_columns(chunk)
+
+
+def _csv_quote(value):
+    """
+    Quotes CSV value if it contains a separator, quote or line break.
+    :param value: String value
+    :return: Quoted value
+    """
+    for char in ',"\r\n':
+        if char in value:
+            return u'"' + value.replace(u'"', u'""') + u'"'
+    return value
+
+
+def _csv_lines(data, na_rep, quote):
+    """
+    Formats column data dictionary as CSV lines. Numeric columns are
+    formatted with Numpy (INTEGER columns without a decimal part) and
+    nominal columns by looking up their codes in a table of formatted
+    labels, so only string columns are formatted value by value.
+    :param data: Column data dictionary
+    :param na_rep: Representation of missing values
+    :param quote: Quote values if necessary
+    :return: CSV lines
+    """
+    columns = []
+    for i in range(len(data['columns'])):
+        attribute_type = data['attributes'][i][1]
+        column = data['columns'][i]
+        labels = _column_labels(data, i)
+        if labels is not None:
+            lookup = [_csv_quote(unicode(label)) if quote else unicode(label) for label in labels] + [na_rep]
+            values = np.array(lookup, dtype=object)[column]
+        elif _is_numeric(attribute_type):
+            missing = np.isnan(column)
+            if _is_integer(attribute_type):
+                values = np.full(len(column), na_rep, dtype=object)
+                values[~missing] = column[~missing].astype(np.int64).astype(str)
+            else:
+                values = column.astype(str).astype(object)
+                values[missing] = na_rep
+        else:
+            if _is_date(attribute_type):
+                column = _format_dates(attribute_type, column)
+            values = np.array([na_rep if value is None else _csv_quote(unicode(value)) if quote else unicode(value)
+                               for value in column], dtype=object)
+        columns.append(values.tolist())
+    return u''.join([u','.join(row) + u'\n' for row in zip(*columns)])
+
+
+def _new_stats(attributes):
+    """
+    Creates empty statistics for the given attributes (see ARFF.describe()).
+    Statistics of different parts of a data set can be combined with
+    _merge_stats().
+    :param attributes: Attributes
+    :return: List of statistics, one dictionary per attribute
+    """
+    stats = []
+    for attribute in attributes:
+        attribute_stats = {'count': 0, 'missing': 0}
+        if _is_numeric(attribute[1]):
+            attribute_stats.update({
+                'min': np.inf, 'max': -np.inf, 'mean': 0.0, 'm2': 0.0,
+                'sample_keys': np.empty(0), 'sample_values': np.empty(0)})
+        elif _is_date(attribute[1]):
+            attribute_stats.update({'min': None, 'max': None})
+        elif type(attribute[1]) is list:
+            attribute_stats.update({'counts': np.zeros(len(attribute[1]), dtype=np.int64), 'oov': 0})
+        stats.append(attribute_stats)
+    return stats
+
+
+def _update_sample(stats, keys, values):
+    """
+    Adds values to the quantile sample of numeric statistics. Each value has
+    a random key and only the values with the QUANTILE_SAMPLE_SIZE smallest
+    keys are kept. This gives a uniform sample that is easily merged.
+    :param stats: Statistics of numeric attribute
+    :param keys: Random keys
+    :param values: Values
+    """
+    keys = np.concatenate([stats['sample_keys'], keys])
+    values = np.concatenate([stats['sample_values'], values])
+    if len(keys) > QUANTILE_SAMPLE_SIZE:
+        keep = np.argpartition(keys, QUANTILE_SAMPLE_SIZE)[:QUANTILE_SAMPLE_SIZE]
+        keys, values = keys[keep], values[keep]
+    stats['sample_keys'] = keys
+    stats['sample_values'] = values
+
+
+def _update_stats(stats, attribute_type, column, labels, rng):
+    """
+    Updates attribute statistics with a column of values. Mean and variance
+    are updated with Welford's algorithm, generalized to batches of values.
+    Nominal columns can hold codes or (unchecked) label strings.
+    :param stats: Statistics of attribute
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :param column: Column
+    :param labels: Labels if column holds nominal or dictionary-encoded codes
+    :param rng: Random number generator for quantile sample
+    """
+    if _is_numeric(attribute_type):
+        values = column[~np.isnan(column)]
+        stats['missing'] += len(column) - len(values)
+        if len(values) > 0:
+            mean = values.mean()
+            m2 = ((values - mean) ** 2).sum()
+            _merge_moments(stats, len(values), mean, m2)
+            stats['min'] = min(stats['min'], values.min())
+            stats['max'] = max(stats['max'], values.max())
+            _update_sample(stats, rng.random_sample(len(values)), values)
+    elif _is_date(attribute_type):
+        values = column[~_is_nat(column)]
+        stats['missing'] += len(column) - len(values)
+        stats['count'] += len(values)
+        if len(values) > 0:
+            for key, value in [('min', values.min()), ('max', values.max())]:
+                if stats[key] is None or (value < stats[key] if key == 'min' else value > stats[key]):
+                    stats[key] = value
+    elif type(attribute_type) is list:
+        if labels is not None:
+            valid = column >= 0
+            stats['counts'] += np.bincount(column[valid], minlength=len(attribute_type))
+            stats['missing'] += len(column) - int(valid.sum())
+            stats['count'] += int(valid.sum())
+        else:
+            index = dict((label, i) for i, label in enumerate(attribute_type))
+            for value in column:
+                if value is None:
+                    stats['missing'] += 1
+                    continue
+                stats['count'] += 1
+                if value in index:
+                    stats['counts'][index[value]] += 1
+                else:
+                    stats['oov'] += 1
+    else:
+        missing = sum([1 for value in column if value is None]) if labels is None else int((column < 0).sum())
+        stats['missing'] += missing
+        stats['count'] += len(column) - missing
+
+
+def _merge_moments(stats, count, mean, m2):
+    """
+    Merges count, mean and sum of squared differences from the mean of a
+    batch of values into numeric statistics (Chan et al.).
+    :param stats: Statistics of numeric attribute
+    :param count: Number of values in batch
+    :param mean: Mean of batch
+    :param m2: Sum of squared differences from mean of batch
+    """
+    total = stats['count'] + count
+    delta = mean - stats['mean']
+    stats['mean'] += delta * count / total
+    stats['m2'] += m2 + delta ** 2 * stats['count'] * count / total
+    stats['count'] = total
+
+
+def _merge_stats(stats1, stats2):
+    """
+    Merges two lists of attribute statistics of the same attributes.
+    :param stats1: Statistics (modified in place)
+    :param stats2: Statistics to merge into stats1
+    :return: Merged statistics
+    """
+    for a, b in zip(stats1, stats2):
+        a['missing'] += b['missing']
+        if 'm2' in a:
+            if b['count'] > 0:
+                _merge_moments(a, b['count'], b['mean'], b['m2'])
+                a['min'] = min(a['min'], b['min'])
+                a['max'] = max(a['max'], b['max'])
+                _update_sample(a, b['sample_keys'], b['sample_values'])
+            continue
+        a['count'] += b['count']
+        if 'counts' in a:
+            a['counts'] += b['counts']
+            a['oov'] += b['oov']
+        elif 'min' in a and b['min'] is not None:
+            a['min'] = b['min'] if a['min'] is None else min(a['min'], b['min'])
+            a['max'] = b['max'] if a['max'] is None else max(a['max'], b['max'])
+    return stats1
+
+
+def _finish_stats(attributes, stats, quantiles):
+    """
+    Converts attribute statistics to the summaries returned by describe().
+    :param attributes: Attributes
+    :param stats: Statistics
+    :param quantiles: Quantiles to compute for numeric attributes
+    :return: Dictionary of attribute name to summary
+    """
+    result = OrderedDict()
+    for attribute, attribute_stats in zip(attributes, stats):
+        summary = OrderedDict([('count', attribute_stats['count']), ('missing', attribute_stats['missing'])])
+        if 'm2' in attribute_stats:
+            count = attribute_stats['count']
+            summary['min'] = attribute_stats['min'] if count > 0 else None
+            summary['max'] = attribute_stats['max'] if count > 0 else None
+            summary['mean'] = attribute_stats['mean'] if count > 0 else None
+            summary['variance'] = attribute_stats['m2'] / (count - 1) if count > 1 else None
+            sample = attribute_stats['sample_values']
+            summary['quantiles'] = OrderedDict(
+                [(q, np.percentile(sample, 100 * q) if len(sample) > 0 else None) for q in quantiles])
+        elif 'counts' in attribute_stats:
+            summary['counts'] = OrderedDict(zip(attribute[1], attribute_stats['counts'].tolist()))
+            summary['oov'] = attribute_stats['oov']
+        elif 'min' in attribute_stats:
+            summary['min'] = attribute_stats['min']
+            summary['max'] = attribute_stats['max']
+        result[attribute[0]] = summary
+    return result
+
+
+def _describe_range(args):
+    """
+    Computes attribute statistics of a byte range of an ARFF file. This
+    function is executed in the worker processes of ARFF.describe().
+    :param args: Tuple (file_name, start, end, seed)
+    :return: List of attribute statistics
+    """
+    file_name, start, end, seed = args
+    data = _load_range(file_name, start, end, nominal_as_string=True)
+    attributes = data['attributes']
+    stats = _new_stats(attributes)
+    rng = np.random.RandomState(seed)
+    while True:
+        rows = list(itertools.islice(data['data'], CHUNK_SIZE))
+        if len(rows) == 0:
+            break
+        _update_row_stats(stats, attributes, rows, rng)
+    return stats
+
+
+def _update_row_stats(stats, attributes, rows, rng):
+    """
+    Updates attribute statistics with data rows (see _update_stats()).
+    Nominal values are converted as strings, so values that are not one of
+    the labels are counted instead of rejected.
+    :param stats: List of statistics (see _new_stats())
+    :param attributes: Attributes
+    :param rows: Data rows
+    :param rng: Numpy random state for quantile sampling
+    """
+    values = list(zip(*rows))
+    for i in range(len(attributes)):
+        attribute_type = attributes[i][1]
+        column = _to_column('STRING' if type(attribute_type) is list else attribute_type, values[i])
+        _update_stats(stats[i], attribute_type, column, None, rng)
+
+
+def _read_columns(args):
+    """
+    Reads ARFF file into a list of columns. This function is executed in
+    the worker processes of ARFF.read_many(). If shared memory is requested
+    and available, numeric columns are copied into shared memory blocks and
+    only their name, type and shape are sent back to the parent process.
+    Object columns are always pickled.
+    :param args: Tuple (file_name, missing, share)
+    :return: List of columns or shared memory descriptors
+    """
+    file_name, missing, share = args
+    columns = ARFF.read_columns(file_name, missing=missing)['columns']
+    modules = _shared_memory()
+    if not share or modules is None:
+        return columns
+    shared_memory, resource_tracker = modules
+    result = []
+    for column in columns:
+        if column.dtype == object:
+            result.append(column)
+            continue
+        block = shared_memory.SharedMemory(create=True, size=max(column.nbytes, 1))
+        np.ndarray(column.shape, dtype=column.dtype, buffer=block.buf)[:] = column
+        result.append((block.name, column.dtype.str, column.shape))
+        block.close()
+        # The parent process unlinks the block once it has been copied so
+        # this process should not clean it up when it exits
+        resource_tracker.unregister(block._name, 'shared_memory')
+    return result
+
+
+def _concat_columns(parts):
+    """
+    Concatenates the columns of multiple files (as returned by _read_columns)
+    into a single list of columns. Numeric columns in shared memory are
+    copied directly into their final position. Their memory blocks are not
+    released here (see _release_columns()).
+    :param parts: List of column lists
+    :return: List of columns
+    """
+    columns = []
+    for i in range(len(parts[0])):
+        pieces = [part[i] for part in parts]
+        if not isinstance(pieces[0], tuple):
+            columns.append(np.concatenate(pieces))
+            continue
+        shared_memory = _shared_memory()[0]
+        dtype = np.dtype(pieces[0][1])
+        column = np.empty(sum([piece[2][0] for piece in pieces]), dtype=dtype)
+        offset = 0
+        for name, _, shape in pieces:
+            block = shared_memory.SharedMemory(name=name)
+            try:
+                column[offset:offset + shape[0]] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            finally:
+                block.close()
+            offset += shape[0]
+        columns.append(column)
+    return columns
+
+
+def _release_columns(parts):
+    """
+    Unlinks the shared memory blocks of columns returned by _read_columns().
+    The worker processes do not clean up their blocks, so this must be
+    called for every part received, also if reading another file failed.
+    :param parts: List of column lists
+    """
+    for part in parts:
+        for piece in part:
+            if not isinstance(piece, tuple):
+                continue
+            try:
+                block = _shared_memory()[0].SharedMemory(name=piece[0])
+            except OSError:
+                continue
+            block.close()
+            block.unlink()
+
+
+def _merge_columns(data1, data2, join_idx1, join_idx2, attribute_indexes):
+    """
+    Merges two column data dictionaries (see ARFF.merge()). If the join
+    attribute is nominal or dictionary-encoded in both data sets, the codes
+    of data2 are translated to codes of data1 and rows are matched by
+    integer lookups only.
+    :param data1: Original data set
+    :param data2: Data set whose columns to add
+    :param join_idx1: Index of join attribute in data1
+    :param join_idx2: Index of join attribute in data2
+    :param attribute_indexes: Indexes of attributes in data2 to add
+    :return: New column data dictionary
+    """
+    if 'columns' not in data2:
+        data2 = ARFF.to_columns(data2)
+    keys1 = data1['columns'][join_idx1]
+    keys2 = data2['columns'][join_idx2]
+    labels1 = _column_labels(data1, join_idx1)
+    labels2 = _column_labels(data2, join_idx2)
+
+    # For each row in data1, find the index of the matching row in data2
+    # or -1 if there is none. If there are duplicate keys in data2, its
+    # last row with that key is used.
+    if labels1 is not None and labels2 is not None:
+        index = dict((label, i) for i, label in enumerate(labels1))
+        translate = np.array([index.get(label, -1) for label in labels2] + [-1], dtype=np.int64)
+        codes2 = translate[keys2]
+        valid = codes2 >= 0
+        position = np.full(len(labels1) + 1, -1, dtype=np.int64)
+        position[codes2[valid]] = np.flatnonzero(valid)
+        rows2 = position[keys1]
+    else:
+        values1 = _from_column(data1['attributes'][join_idx1][1], keys1, labels1)
+        values2 = _from_column(data2['attributes'][join_idx2][1], keys2, labels2)
+        lookup = dict((key, i) for i, key in enumerate(values2))
+        rows2 = np.array([lookup.get(key, -1) for key in values1], dtype=np.int64)
+
+    found = rows2 >= 0
+    for key in _from_column(data1['attributes'][join_idx1][1], keys1[~found], labels1):
+        print('WARNING: row with id {} not present in data2'.format(key))
+
+    dictionaries1 = data1.get('dictionaries') or [None] * len(data1['columns'])
+    dictionaries2 = data2.get('dictionaries') or [None] * len(data2['columns'])
+    return {
+        'relation': data1['relation'],
+        'attributes': data1['attributes'] + [data2['attributes'][j] for j in attribute_indexes],
+        'columns': [column[found] for column in data1['columns']] +
+                   [data2['columns'][j][rows2[found]] for j in attribute_indexes],
+        'dictionaries': dictionaries1 + [dictionaries2[j] for j in attribute_indexes],
+        'description': ''
+    }
+
+
+def _mix(hashes):
+    """
+    Scrambles the bits of 64-bit integers (the splitmix64 finalizer), so
+    that similar inputs result in very different hashes.
+    :param hashes: Numpy array of uint64
+    :return: Numpy array of uint64
+    """
+    hashes = hashes ^ (hashes >> np.uint64(30))
+    hashes = hashes * np.uint64(0xbf58476d1ce4e5b9)
+    hashes = hashes ^ (hashes >> np.uint64(27))
+    hashes = hashes * np.uint64(0x94d049bb133111eb)
+    return hashes ^ (hashes >> np.uint64(31))
+
+
+def _hash_strings(values):
+    """
+    Computes 64-bit hashes of string values. They are derived from MD5
+    (not Python's hash()) so they are the same in every process and
+    every run. Each distinct value is only hashed once.
+    :param values: Strings (None for missing values)
+    :return: Numpy array of uint64
+    """
+    cache = {}
+    hashes = np.empty(len(values), dtype=np.uint64)
+    for i, value in enumerate(values):
+        h = cache.get(value)
+        if h is None:
+            if value is None:
+                h = MISSING_HASH
+            else:
+                h = struct.unpack('<Q', hashlib.md5(unicode(value).encode('utf-8')).digest()[:8])[0]
+            cache[value] = h
+        hashes[i] = h
+    return hashes
+
+
+def _column_hashes(attribute_type, column, labels=None):
+    """
+    Computes 64-bit hashes of the values of a column. Values are normalized
+    first, so the hashes do not depend on how the data is represented:
+    nominal and dictionary-encoded values are hashed by their label (not
+    their code), -0.0 hashes like 0.0 and all missing values hash to
+    MISSING_HASH.
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :param column: Numpy array
+    :param labels: Labels of nominal or dictionary-encoded column
+    :return: Numpy array of uint64
+    """
+    if labels is not None:
+        lookup = np.append(_hash_strings(labels), np.uint64(MISSING_HASH))
+        return lookup[column]
+    if column.dtype.kind == 'f':
+        values = column.astype(np.float64) + 0.0
+        hashes = _mix(values.view(np.uint64))
+        hashes[np.isnan(values)] = MISSING_HASH
+        return hashes
+    if column.dtype.kind == 'M':
+        hashes = _mix(column.astype('datetime64[ns]').view(np.uint64))
+        hashes[_is_nat(column)] = MISSING_HASH
+        return hashes
+    return _hash_strings(column)
+
+
+def _row_hashes(data, indexes):
+    """
+    Computes 64-bit hashes of the rows of a column data dictionary by
+    combining the hashes of the given columns.
+    :param data: Column data dictionary
+    :param indexes: Indexes of the columns to hash
+    :return: Numpy array of uint64
+    """
+    num_rows = len(data['columns'][0]) if len(data['columns']) > 0 else 0
+    hashes = np.zeros(num_rows, dtype=np.uint64)
+    for position, i in enumerate(indexes):
+        column_hashes = _column_hashes(data['attributes'][i][1], data['columns'][i], _column_labels(data, i))
+        hashes = _mix(hashes * np.uint64(0x9e3779b97f4a7c15) + column_hashes + np.uint64(position))
+    return hashes
+
+
+class _HashSet(object):
+    """
+    Set of 64-bit hashes, stored as a few sorted Numpy arrays of decreasing
+    size (each at most half the size of the previous one), so that every
+    hash takes 8 bytes and a batch of hashes is looked up with a binary
+    search per array. Adding a batch merges arrays of similar size, like
+    a log-structured merge tree, so each hash is only copied O(log n) times.
+    """
+    def __init__(self):
+        self._levels = []
+
+    def __len__(self):
+        return sum([len(level) for level in self._levels])
+
+    def contains(self, hashes):
+        """
+        Checks which hashes are in the set.
+        :param hashes: Numpy array of uint64
+        :return: Boolean Numpy array
+        """
+        found = np.zeros(len(hashes), dtype=bool)
+        for level in self._levels:
+            positions = np.minimum(np.searchsorted(level, hashes), len(level) - 1)
+            found |= level[positions] == hashes
+        return found
+
+    def add_new(self, hashes):
+        """
+        Adds hashes to the set.
+        :param hashes: Numpy array of uint64
+        :return: Boolean Numpy array, True for the first occurrence of
+        each hash that was not in the set before
+        """
+        new = np.zeros(len(hashes), dtype=bool)
+        new[np.unique(hashes, return_index=True)[1]] = True
+        new &= ~self.contains(hashes)
+        level = np.sort(hashes[new])
+        while len(self._levels) > 0 and len(self._levels[-1]) <= 2 * len(level):
+            level = np.sort(np.concatenate([self._levels.pop(), level]))
+        if len(level) > 0:
+            self._levels.append(level)
+        return new
+
+
+def _fingerprint_range(args):
+    """
+    Computes the order-independent sums of the row hashes of a byte range
+    of an ARFF file. This function is executed in the worker processes of
+    ARFF.fingerprint().
+    :param args: Tuple (file_name, start, end)
+    :return: Tuple (number of rows, sum of hashes, sum of mixed hashes)
+    """
+    file_name, start, end = args
+    return _fingerprint_chunks(_iter_range_chunks(file_name, start, end))
+
+
+def _fingerprint_chunks(chunks):
+    """
+    Computes the order-independent sums of the row hashes of column data
+    dictionaries. Two sums of differently mixed hashes are kept, modulo
+    2^64, to make collisions between different sets of rows less likely.
+    :param chunks: Column data dictionaries
+    :return: Tuple (number of rows, sum of hashes, sum of mixed hashes)
+    """
+    num_rows, sum1, sum2 = 0, 0, 0
+    for chunk in chunks:
+        hashes = _row_hashes(chunk, range(len(chunk['attributes'])))
+        num_rows += len(hashes)
+        sum1 = (sum1 + int(hashes.sum(dtype=np.uint64))) % 2 ** 64
+        sum2 = (sum2 + int(_mix(hashes ^ np.uint64(MISSING_HASH)).sum(dtype=np.uint64))) % 2 ** 64
+    return num_rows, sum1, sum2
+
+
+def _parallel_map(function, tasks, workers):
+    """
+    Applies function to each task, in a pool of worker processes if there
+    is more than one worker and more than one task.
+    :param function: Function (defined at module level)
+    :param tasks: List of arguments
+    :param workers: Number of worker processes
+    :return: List of results, in the order of the tasks
+    """
+    if workers > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(min(workers, len(tasks)))
+        try:
+            return pool.map(function, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    return [function(task) for task in tasks]
+
+
+def _empty_columns(data):
+    """
+    Returns a column data dictionary without rows, with the attributes of
+    the given ARFF file, data dictionary or column data dictionary.
+    :param data: File name, data dictionary or column data dictionary
+    :return: Column data dictionary
+    """
+    if isinstance(data, basestring):
+        return ARFF.to_columns(ARFF.read_header(data))
+    if 'columns' in data:
+        return _select_rows(data, slice(0, 0))
+    return ARFF.to_columns(dict(data, data=[]))
+
+
+def _concat_chunks(empty, chunks):
+    """
+    Concatenates the rows of column data dictionaries.
+    :param empty: Column data dictionary without rows (see _empty_columns())
+    :param chunks: Column data dictionaries with the same attributes
+    :return: Column data dictionary
+    """
+    chunks = list(chunks)
+    result = dict(empty)
+    result['columns'] = [np.concatenate([empty['columns'][i]] + [chunk['columns'][i] for chunk in chunks])
+                         for i in range(len(empty['columns']))]
+    return result
+
+
+def _num_rows(data):
+    """
+    Returns number of rows of a column data dictionary.
+    :param data: Column data dictionary
+    :return: Number of rows
+    """
+    return len(data['columns'][0]) if len(data['columns']) > 0 else 0
+
+
+def _dummy_columns(attribute, labels, codes):
+    """
+    Creates the numeric dummy columns of a nominal column (see
+    ARFF.dummy_encode()). A binominal column becomes a single column of
+    zeros and ones, other columns become one column per label.
+    :param attribute: Attribute name
+    :param labels: Nominal values
+    :param codes: Codes of nominal column
+    :return: Tuple (list of attributes, list of columns)
+    """
+    if len(labels) == 2:
+        return [(attribute, 'NUMERIC')], [(codes != 0).astype(np.float64)]
+    return [(label, 'NUMERIC') for label in labels], [(codes == j).astype(np.float64) for j in range(len(labels))]
+
+
+def _select_rows(data, mask):
+    """
+    Selects rows of a column data dictionary.
+    :param data: Column data dictionary
+    :param mask: Boolean Numpy array or row indexes
+    :return: New column data dictionary
+    """
+    selection = dict(data)
+    selection['columns'] = [column[mask] for column in data['columns']]
+    return selection
+
+
+def _write_header(f, data):
+    """
+    Writes the header of a data dictionary (everything up to and including
+    the @DATA line) to a binary file, so rows can be written afterwards.
+    :param f: File object opened in binary mode
+    :param data: Data dictionary or column data dictionary
+    """
+    header = {
+        'relation': data['relation'],
+        'attributes': data['attributes'],
+        'description': data.get('description', '')
+    }
+    lines = io.StringIO()
+    _dump(header, lines)
+    f.write((lines.getvalue().rstrip(u'\n') + u'\n').encode('utf-8'))
+
+
+def _write_rows(f, data):
+    """
+    Writes the rows of a column data dictionary as ARFF data lines to a
+    binary file.
+    :param f: File object opened in binary mode
+    :param data: Column data dictionary
+    """
+    rows = ARFF.from_columns(data)['data']
+    f.write(u''.join([_format_row(row) + u'\n' for row in rows]).encode('utf-8'))
+
+
+def _fractions(fractions):
+    """
+    Checks fractions of ARFF.split() and scales them so they sum to 1.
+    :param fractions: List of positive numbers
+    :return: List of fractions
+    """
+    if len(fractions) == 0 or min(fractions) <= 0:
+        raise RuntimeError('Fractions should be positive')
+    total = float(sum(fractions))
+    return [fraction / total for fraction in fractions]
+
+
+def _stratum_index(attributes, stratify_by):
+    """
+    Returns index of the nominal attribute to stratify by, or None.
+    :param attributes: Attributes
+    :param stratify_by: Attribute name or None
+    :return: Attribute index or None
+    """
+    if stratify_by is None:
+        return None
+    for i in range(len(attributes)):
+        if attributes[i][0] == stratify_by:
+            if not type(attributes[i][1]) is list:
+                raise RuntimeError('Attribute ' + stratify_by + ' is not nominal')
+            return i
+    raise RuntimeError('Attribute ' + stratify_by + ' not found')
+
+
+def _strata(data, stratum_index):
+    """
+    Returns stratum of each row of a column data dictionary: its nominal
+    code plus one (0 for missing values), or 0 if there is no stratification.
+    :param data: Column data dictionary
+    :param stratum_index: Index of nominal attribute or None
+    :return: Numpy array of int64
+    """
+    if stratum_index is None:
+        return np.zeros(_num_rows(data), dtype=np.int64)
+    return data['columns'][stratum_index].astype(np.int64) + 1
+
+
+class _Splitter(object):
+    """
+    Assigns rows to splits such that the rows of each stratum are divided
+    according to the fractions at every point in the stream. A row goes
+    to a random split among the ones that got less than their fraction of
+    the rows of its stratum so far, with a probability proportional to the
+    shortfall. Each stratum has its own random generator, so the splits
+    do not depend on how the rows are chunked.
+    """
+    def __init__(self, fractions, seed):
+        self._fractions = fractions
+        self._seed = seed
+        self._strata = {}
+
+    def assign(self, strata):
+        """
+        Assigns rows to splits.
+        :param strata: Stratum of each row (see _strata())
+        :return: Numpy array with split index of each row
+        """
+        splits = np.empty(len(strata), dtype=np.int64)
+        for stratum in np.unique(strata):
+            rows = np.flatnonzero(strata == stratum)
+            if stratum not in self._strata:
+                self._strata[stratum] = (np.random.RandomState(self._seed + [int(stratum)]), [0] * len(self._fractions))
+            rng, counts = self._strata[stratum]
+            splits[rows] = [self._next(counts, u) for u in rng.random_sample(len(rows))]
+        return splits
+
+    def _next(self, counts, u):
+        n = sum(counts) + 1
+        shortfalls = [max(fraction * n - count, 0.0) for fraction, count in zip(self._fractions, counts)]
+        split = shortfalls.index(max(shortfalls))
+        u *= sum(shortfalls)
+        for j in range(len(shortfalls)):
+            if u < shortfalls[j]:
+                split = j
+                break
+            u -= shortfalls[j]
+        counts[split] += 1
+        return split
+
+
+def _split_chunks(chunks, fractions, stratum_index, seed, files=None):
+    """
+    Splits rows of column data dictionaries (see ARFF.split()).
+    :param chunks: Column data dictionaries
+    :param fractions: Fractions (summing to 1)
+    :param stratum_index: Index of nominal attribute to stratify by or None
+    :param seed: Seed, as list of integers
+    :param files: Files opened in binary mode to write the rows of each split
+    to (without header) or None
+    :return: List of column data dictionaries per split if no files are
+    given, otherwise the number of rows written to each file
+    """
+    splitter = _Splitter(fractions, seed)
+    parts = [[] for _ in fractions]
+    counts = [0] * len(fractions)
+    for chunk in chunks:
+        splits = splitter.assign(_strata(chunk, stratum_index))
+        for j in range(len(fractions)):
+            part = _select_rows(chunk, splits == j)
+            counts[j] += _num_rows(part)
+            if files is None:
+                parts[j].append(part)
+            else:
+                _write_rows(files[j], part)
+    return counts if files is not None else parts
+
+
+def _split_range(args):
+    """
+    Splits the rows of a byte range of an ARFF file. This function is
+    executed in the worker processes of ARFF.split(). If file names are
+    given, the rows of each split are written to these files (without
+    header), otherwise they are returned.
+    :param args: Tuple (file_name, start, end, fractions, stratum_index, seed, part_file_names)
+    :return: See _split_chunks()
+    """
+    file_name, start, end, fractions, stratum_index, seed, part_file_names = args
+    chunks = _iter_range_chunks(file_name, start, end)
+    if part_file_names is None:
+        return _split_chunks(chunks, fractions, stratum_index, seed)
+    files = [open(part_file_name, 'wb') for part_file_name in part_file_names]
+    try:
+        return _split_chunks(chunks, fractions, stratum_index, seed, files)
+    finally:
+        for f in files:
+            f.close()
+
+
+class _RowSample(object):
+    """
+    Uniform random sample of at most size rows per stratum, kept as the
+    rows with the smallest random keys (a bottom-k sample). Samples of
+    different parts of a data set can be merged into a sample of the whole.
+    New rows are skipped if their key is larger than the largest key of a
+    full stratum, and buffered otherwise. The buffer is merged with the
+    sample once it holds more than size rows, so memory stays O(size) per
+    stratum.
+    """
+    def __init__(self, size, num_strata):
+        self.size = size
+        self.counts = np.zeros(num_strata, dtype=np.int64)
+        self._thresholds = np.full(num_strata, np.inf)
+        self._parts = []
+        self._num_buffered = 0
+
+    def add(self, chunk, keys, strata, order):
+        """
+        Adds rows to the sample.
+        :param chunk: Column data dictionary
+        :param keys: Random key of each row
+        :param strata: Stratum of each row (see _strata())
+        :param order: Position of each row in the data set
+        """
+        self.counts += np.bincount(strata, minlength=len(self.counts))
+        keep = keys < self._thresholds[strata]
+        if not keep.any():
+            return
+        self._parts.append((keys[keep], strata[keep], order[keep], _select_rows(chunk, keep)))
+        self._num_buffered += int(keep.sum())
+        if self._num_buffered > self.size:
+            self._compact()
+
+    def merge(self, other):
+        """
+        Merges another sample (with the same size) into this one.
+        :param other: Sample
+        """
+        self.counts += other.counts
+        self._parts.extend(other._parts)
+        self._compact()
+
+    def rows(self, empty, n):
+        """
+        Returns sample of n rows in their original order. If there are
+        multiple strata, the rows are divided over them in proportion to
+        their size.
+        :param empty: Column data dictionary without rows
+        :param n: Number of rows
+        :return: Column data dictionary
+        """
+        self._compact()
+        if len(self._parts) == 0:
+            return empty
+        keys, strata, order, chunk = self._parts[0]
+        if self.counts.sum() <= n:
+            sizes = self.counts
+        else:
+            quotas = n * self.counts / float(self.counts.sum())
+            sizes = np.floor(quotas).astype(np.int64)
+            sizes[np.argsort(sizes - quotas, kind='mergesort')[:n - sizes.sum()]] += 1
+        selected = self._ranked(keys, strata, sizes)
+        return _concat_chunks(empty, [_select_rows(chunk, selected[np.argsort(order[selected])])])
+
+    def _ranked(self, keys, strata, sizes):
+        # Indexes of the rows with the smallest keys of each stratum
+        ranked = np.lexsort((keys, strata))
+        sorted_strata = strata[ranked]
+        rank = np.arange(len(ranked)) - np.searchsorted(sorted_strata, sorted_strata)
+        return ranked[rank < sizes[sorted_strata]]
+
+    def _compact(self):
+        if len(self._parts) == 0:
+            return
+        keys = np.concatenate([part[0] for part in self._parts])
+        strata = np.concatenate([part[1] for part in self._parts])
+        order = np.concatenate([part[2] for part in self._parts])
+        chunk = _concat_chunks(_select_rows(self._parts[0][3], slice(0, 0)), [part[3] for part in self._parts])
+        kept = self._ranked(keys, strata, np.full(len(self.counts), self.size, dtype=np.int64))
+        self._parts = [(keys[kept], strata[kept], order[kept], _select_rows(chunk, kept))]
+        self._num_buffered = 0
+        full = np.bincount(strata[kept], minlength=len(self.counts)) >= self.size
+        largest = np.full(len(self.counts), -np.inf)
+        np.maximum.at(largest, strata[kept], keys[kept])
+        self._thresholds = np.where(full, largest, np.inf)
+
+
+def _sample_chunks(chunks, size, stratum_index, num_strata, seed, range_index=0):
+    """
+    Computes bottom-k sample of rows of column data dictionaries.
+    :param chunks: Column data dictionaries
+    :param size: Maximum number of rows per stratum
+    :param stratum_index: Index of nominal attribute to stratify by or None
+    :param num_strata: Number of strata
+    :param seed: Seed, as list of integers
+    :param range_index: Index of byte range, to order rows of different ranges
+    :return: Sample
+    """
+    sample = _RowSample(size, num_strata)
+    rng = np.random.RandomState(seed)
+    position = range_index * 2 ** 40
+    for chunk in chunks:
+        num_rows = _num_rows(chunk)
+        order = np.arange(position, position + num_rows, dtype=np.int64)
+        sample.add(chunk, rng.random_sample(num_rows), _strata(chunk, stratum_index), order)
+        position += num_rows
+    sample._compact()
+    return sample
+
+
+def _sample_range(args):
+    """
+    Computes bottom-k sample of a byte range of an ARFF file. This function
+    is executed in the worker processes of ARFF.reservoir_sample().
+    :param args: Tuple (file_name, start, end, size, stratum_index, num_strata, seed, range_index)
+    :return: Sample
+    """
+    file_name, start, end, size, stratum_index, num_strata, seed, range_index = args
+    return _sample_chunks(_iter_range_chunks(file_name, start, end), size, stratum_index, num_strata, seed,
+                          range_index)
 
 
 class ARFF(object):
@@ -19,19 +1809,196 @@ class ARFF(object):
         :param missing: List of missing value representations
         :return: Data dictionary
         """
-        data = arff.load(open(file_name))
-        if missing is not None:
-            for i in range(len(data['data'])):
-                for j in range(len(data['data'][i])):
-                    if type(missing) is str:
-                        if data['data'][i][j] == missing:
-                            data['data'][i][j] = None
-                    elif type(missing) is list:
-                        for m in missing:
-                            if data['data'][i][j] == m:
-                                data['data'][i][j] = None                                
-                    else:
-                        raise RuntimeError('Invalid type for \'missing\' parameter ' + str(type(missing)))
+        with open(file_name) as f:
+            data = _load(f)
+        _replace_missing(data['data'], missing)
+        return data
+
+    @staticmethod
+    def read_header(file_name):
+        """
+        Loads only the header of an ARFF file, i.e., its description,
+        relation and attributes. The data section is not read at all so
+        this is cheap, even for very large files.
+        :param file_name: File name
+        :return: Data dictionary without data rows
+        """
+        with open(file_name) as f:
+            data = _load(f, return_type=arff.DENSE_GEN)
+        data['data'] = []
+        return data
+
+    @staticmethod
+    def read_chunks(file_name, chunk_size=CHUNK_SIZE, missing=None):
+        """
+        Loads ARFF file progressively. Each chunk is a data dictionary with
+        the relation and attributes of the file and at most chunk_size data
+        rows. This way files can be processed that do not fit in memory.
+        :param file_name: File name
+        :param chunk_size: Maximum number of rows per chunk
+        :param missing: List of missing value representations (see read())
+        :return: Generator of data dictionaries
+        """
+        with open(file_name) as f:
+            data = _load(f, return_type=arff.DENSE_GEN)
+            while True:
+                rows = list(itertools.islice(data['data'], chunk_size))
+                if len(rows) == 0:
+                    break
+                _replace_missing(rows, missing)
+                yield {
+                    'relation': data['relation'],
+                    'attributes': data['attributes'],
+                    'data': rows,
+                    'description': data['description']
+                }
+
+    @staticmethod
+    def count(file_name):
+        """
+        Counts the data rows of an ARFF file. The rows are not parsed, so
+        this is much faster than loading the file.
+        :param file_name: File name
+        :return: Number of rows
+        """
+        num_rows = 0
+        with open(file_name, 'rb') as f:
+            _read_header_lines(f)
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith(b'%'):
+                    num_rows += 1
+        return num_rows
+
+    @staticmethod
+    def concat(file_names, out_file_name):
+        """
+        Concatenates ARFF files with identical attributes into a single ARFF
+        file. Only the headers are parsed, the data lines are copied as is.
+        The output file cannot be one of the input files, because it is
+        truncated before the input files are read.
+        :param file_names: List of file names
+        :param out_file_name: Output file name
+        :return:
+        """
+        out_path = os.path.realpath(out_file_name)
+        for file_name in file_names:
+            if os.path.realpath(file_name) == out_path:
+                raise RuntimeError('Output file ' + out_file_name + ' is also an input file')
+        attributes = ARFF.read_header(file_names[0])['attributes']
+        for file_name in file_names[1:]:
+            try:
+                _check_attributes(attributes, ARFF.read_header(file_name)['attributes'])
+            except RuntimeError as e:
+                raise RuntimeError(file_name + ': ' + str(e))
+        with open(out_file_name, 'wb') as out:
+            for i in range(len(file_names)):
+                with open(file_names[i], 'rb') as f:
+                    header_lines = _read_header_lines(f)
+                    if i == 0:
+                        out.writelines(header_lines)
+                    line = b''
+                    for line in f:
+                        out.write(line)
+                    if line and not line.endswith(b'\n'):
+                        out.write(b'\n')
+
+    @staticmethod
+    def read_columns(file_name, missing=None, encode_strings=False, max_dictionary_size=MAX_DICTIONARY_SIZE):
+        """
+        Loads ARFF file into column data dictionary (see to_columns()). The
+        file is read in chunks and each chunk is converted to columns right
+        away, so nominal values are only kept as strings for a single chunk
+        before they are replaced by their codes.
+        :param file_name: File name
+        :param missing: List of missing value representations (see read())
+        :param encode_strings: Dictionary-encode string attributes
+        :param max_dictionary_size: Maximum number of distinct strings
+        :return: Column data dictionary
+        """
+        data = ARFF.to_columns(ARFF.read_header(file_name))
+        chunks = [ARFF.to_columns(chunk)['columns'] for chunk in ARFF.read_chunks(file_name, missing=missing)]
+        if len(chunks) == 1:
+            data['columns'] = chunks[0]
+        elif len(chunks) > 1:
+            data['columns'] = [np.concatenate(parts) for parts in zip(*chunks)]
+        if encode_strings:
+            data['columns'], data['dictionaries'] = _encode_string_columns(data['columns'], max_dictionary_size)
+        return data
+
+    @staticmethod
+    def read_many(file_names, workers=None, output='columns', missing=None):
+        """
+        Loads many ARFF files with identical attributes, e.g., daily shards,
+        into a single data set. All headers are checked before any data is
+        read. The files are then parsed in a pool of worker processes. Numeric
+        columns are passed back through shared memory (Python 3.8+) and the
+        columns of all files are concatenated only once.
+        :param file_names: List of file names or glob pattern
+        :param workers: Number of worker processes (default: number of CPUs)
+        :param output: Type of output: 'columns', 'frame' or 'dict'
+        :param missing: List of missing value representations (see read())
+        :return: Column data dictionary, data frame or data dictionary
+        """
+        if isinstance(file_names, basestring):
+            pattern = file_names
+            file_names = sorted(glob.glob(pattern))
+            if len(file_names) == 0:
+                raise RuntimeError('No files found matching ' + pattern)
+        if len(file_names) == 0:
+            raise RuntimeError('No files given')
+        if output not in ['columns', 'frame', 'dict']:
+            raise RuntimeError('Invalid output ' + str(output))
+
+        # Check that all files have the same attributes before we start
+        # parsing any of them
+        headers = [ARFF.read_header(file_name) for file_name in file_names]
+        for i in range(1, len(headers)):
+            try:
+                _check_attributes(headers[0]['attributes'], headers[i]['attributes'])
+            except RuntimeError as e:
+                raise RuntimeError(file_names[i] + ': ' + str(e))
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        workers = min(workers, len(file_names))
+        parts = []
+        try:
+            if workers > 1:
+                # Collect the results of all files, even after a failure, so
+                # that the shared memory blocks of every file are released
+                error = None
+                pool = multiprocessing.Pool(workers)
+                try:
+                    results = [pool.apply_async(_read_columns, ((file_name, missing, True),))
+                               for file_name in file_names]
+                    for result in results:
+                        try:
+                            parts.append(result.get())
+                        except Exception as e:
+                            error = e if error is None else error
+                finally:
+                    pool.close()
+                    pool.join()
+                if error is not None:
+                    raise error
+            else:
+                parts = [_read_columns((file_name, missing, False)) for file_name in file_names]
+            columns = _concat_columns(parts)
+        finally:
+            _release_columns(parts)
+
+        data = {
+            'relation': headers[0]['relation'],
+            'attributes': headers[0]['attributes'],
+            'columns': columns,
+            'dictionaries': [None] * len(headers[0]['attributes']),
+            'description': headers[0]['description']
+        }
+        if output == 'frame':
+            return ARFF.to_data_frame(data)
+        if output == 'dict':
+            return ARFF.from_columns(data)
         return data
 
     @staticmethod
@@ -71,6 +2038,297 @@ class ARFF(object):
         }
         
 
+    @staticmethod
+    def describe(data, workers=None, quantiles=(0.25, 0.5, 0.75), seed=0):
+        """
+        Computes summary statistics for each attribute in a single pass over
+        the data, without loading it into memory. For numeric attributes it
+        returns count, missing count, min, max, mean, variance and quantiles.
+        Quantiles are approximate because they are computed from a uniform
+        sample of at most QUANTILE_SAMPLE_SIZE values. For nominal attributes
+        it returns count, missing count, a histogram of the labels and the
+        number of values that are not one of the labels (out-of-vocabulary).
+        Dates get their min and max, strings only their counts. Files are
+        split in byte ranges of RANGE_SIZE that are processed in parallel.
+        Their partial statistics are merged afterwards. Like split(), the
+        statistics only depend on the seed, not on the number of workers.
+        :param data: File name(s), glob pattern, data dictionary or column data dictionary
+        :param workers: Number of worker processes (default: number of CPUs)
+        :param quantiles: Quantiles to compute for numeric attributes
+        :param seed: Seed for quantile sampling
+        :return: Dictionary of attribute name to summary
+        """
+        if isinstance(data, dict):
+            rng = np.random.RandomState(seed)
+            stats = _new_stats(data['attributes'])
+            if 'columns' not in data:
+                for start in range(0, len(data['data']), CHUNK_SIZE):
+                    _update_row_stats(stats, data['attributes'], data['data'][start:start + CHUNK_SIZE], rng)
+                return _finish_stats(data['attributes'], stats, quantiles)
+            for chunk in _iter_column_chunks(data):
+                for i in range(len(chunk['attributes'])):
+                    _update_stats(stats[i], chunk['attributes'][i][1], chunk['columns'][i],
+                                  _column_labels(chunk, i), rng)
+            return _finish_stats(data['attributes'], stats, quantiles)
+
+        file_names = data
+        if isinstance(file_names, basestring):
+            file_names = [file_names] if os.path.isfile(file_names) else sorted(glob.glob(file_names))
+        if len(file_names) == 0:
+            raise RuntimeError('No files found matching ' + str(data))
+        attributes = ARFF.read_header(file_names[0])['attributes']
+        for file_name in file_names[1:]:
+            try:
+                _check_attributes(attributes, ARFF.read_header(file_name)['attributes'])
+            except RuntimeError as e:
+                raise RuntimeError(file_name + ': ' + str(e))
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        tasks = []
+        for file_name in file_names:
+            for start, end in _data_ranges(file_name):
+                tasks.append((file_name, start, end, [seed, len(tasks)]))
+        parts = _parallel_map(_describe_range, tasks, workers)
+
+        stats = _new_stats(attributes)
+        for part in parts:
+            _merge_stats(stats, part)
+        return _finish_stats(attributes, stats, quantiles)
+
+    @staticmethod
+    def drop_duplicates(data, subset=None, out_path=None, verify=False, chunk_size=CHUNK_SIZE):
+        """
+        Removes duplicate rows, keeping the first occurrence of each row. Rows
+        are compared by 64-bit hashes of their normalized values (or only the
+        values of the subset attributes), which are kept in a compact hash set
+        of 8 bytes per distinct row, so files are processed in a single
+        streaming pass. Different rows with the same hash are very unlikely
+        but possible. If verify is set, a second pass compares the values of
+        all rows whose hash occurred more than once, so that no rows are
+        dropped because of a hash collision.
+        :param data: File name, data dictionary or column data dictionary
+        :param subset: Attribute name(s) to compare rows by (default: all)
+        :param out_path: File name to write the remaining rows to
+        :param verify: Compare the values of rows with the same hash
+        :param chunk_size: Number of rows to process at once
+        :return: Data of the same kind as the input (column data dictionary
+        for files), or the number of rows written if out_path is given
+        """
+        header = _empty_columns(data)
+        names = [attribute[0] for attribute in header['attributes']]
+        if subset is None:
+            indexes = range(len(names))
+        else:
+            if isinstance(subset, basestring):
+                subset = [subset]
+            for name in subset:
+                if name not in names:
+                    raise RuntimeError('Attribute ' + name + ' not found')
+            indexes = [names.index(name) for name in subset]
+
+        def deduplicated():
+            seen = _HashSet()
+            if not verify:
+                for chunk in _iter_column_chunks(data, chunk_size):
+                    yield _select_rows(chunk, seen.add_new(_row_hashes(chunk, indexes)))
+                return
+            duplicates = [np.empty(0, dtype=np.uint64)]
+            for chunk in _iter_column_chunks(data, chunk_size):
+                hashes = _row_hashes(chunk, indexes)
+                duplicates.append(hashes[~seen.add_new(hashes)])
+            duplicates = np.unique(np.concatenate(duplicates))
+
+            # Only rows whose hash occurs more than once need to be compared
+            # by their values
+            rows_seen = {}
+            for chunk in _iter_column_chunks(data, chunk_size):
+                hashes = _row_hashes(chunk, indexes)
+                keep = np.ones(len(hashes), dtype=bool)
+                candidates = np.flatnonzero(np.isin(hashes, duplicates))
+                values = [_from_column(chunk['attributes'][i][1], chunk['columns'][i][candidates],
+                                       _column_labels(chunk, i)) for i in indexes]
+                for j, row in zip(candidates, zip(*values)):
+                    rows = rows_seen.setdefault(int(hashes[j]), set())
+                    if row in rows:
+                        keep[j] = False
+                    else:
+                        rows.add(row)
+                yield _select_rows(chunk, keep)
+
+        if out_path is not None:
+            num_rows = 0
+            with open(out_path, 'wb') as f:
+                _write_header(f, header)
+                for chunk in deduplicated():
+                    _write_rows(f, chunk)
+                    num_rows += _num_rows(chunk)
+            return num_rows
+
+        result = _concat_chunks(header, deduplicated())
+        if isinstance(data, dict) and 'columns' not in data:
+            return ARFF.from_columns(result)
+        return result
+
+    @staticmethod
+    def fingerprint(data, workers=None):
+        """
+        Computes a fingerprint of the schema (attribute names and types) and
+        rows of a data set that does not depend on the order of the rows or
+        on how the data is represented. Two data sets have the same
+        fingerprint if they hold the same attributes and the same rows (with
+        the same number of duplicates). The relation name and description
+        are ignored. The fingerprint combines order-independent sums of row
+        hashes, so files are split in byte ranges that are processed in
+        parallel.
+        :param data: File name, data dictionary or column data dictionary
+        :param workers: Number of worker processes (default: number of CPUs)
+        :return: Fingerprint as hexadecimal string
+        """
+        if isinstance(data, basestring):
+            attributes = ARFF.read_header(data)['attributes']
+            if workers is None:
+                workers = multiprocessing.cpu_count()
+            tasks = [(data, start, end) for start, end in _data_ranges(data, workers)]
+            parts = _parallel_map(_fingerprint_range, tasks, workers)
+        else:
+            attributes = data['attributes']
+            parts = [_fingerprint_chunks(_iter_column_chunks(data))]
+
+        schema = json.dumps([[unicode(attribute[0]), attribute[1]] for attribute in attributes])
+        num_rows = sum([part[0] for part in parts])
+        sum1 = sum([part[1] for part in parts]) % 2 ** 64
+        sum2 = sum([part[2] for part in parts]) % 2 ** 64
+        return hashlib.md5('{}:{}:{}:{}'.format(schema, num_rows, sum1, sum2).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def split(data, fractions, out_paths=None, stratify_by=None, seed=0, workers=None):
+        """
+        Splits rows randomly in parts of the given fractions, e.g., to create
+        train and test sets, in a single streaming pass. If stratify_by is
+        given, the rows of each label of that nominal attribute are split in
+        the same fractions. Files are split in byte ranges of RANGE_SIZE that
+        are processed in parallel, with a random generator per range that is
+        seeded from seed and the range index. The result therefore only
+        depends on the seed, not on the number of workers. Within a range,
+        the number of rows of each part (per stratum) differs at most about
+        one row from its fraction.
+        :param data: File name, data dictionary or column data dictionary
+        :param fractions: Relative sizes of the parts, e.g., [0.8, 0.2]
+        :param out_paths: File names to write the parts to (one per fraction)
+        :param stratify_by: Name of nominal attribute to stratify by
+        :param seed: Seed
+        :param workers: Number of worker processes (default: number of CPUs)
+        :return: List of data of the same kind as the input (column data
+        dictionaries for files), or the number of rows written to each file
+        if out_paths is given
+        """
+        fractions = _fractions(fractions)
+        if out_paths is not None and not len(out_paths) == len(fractions):
+            raise RuntimeError('Expected ' + str(len(fractions)) + ' output files')
+        empty = _empty_columns(data)
+        stratum_index = _stratum_index(empty['attributes'], stratify_by)
+
+        if not isinstance(data, basestring):
+            chunks = _iter_column_chunks(data)
+            if out_paths is None:
+                parts = _split_chunks(chunks, fractions, stratum_index, [seed, 0])
+                result = [_concat_chunks(empty, part) for part in parts]
+                if 'columns' not in data:
+                    return [ARFF.from_columns(part) for part in result]
+                return result
+            files = [open(out_path, 'wb') for out_path in out_paths]
+            try:
+                for f in files:
+                    _write_header(f, empty)
+                return _split_chunks(chunks, fractions, stratum_index, [seed, 0], files)
+            finally:
+                for f in files:
+                    f.close()
+
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        tasks = []
+        for start, end in _data_ranges(data):
+            part_file_names = None
+            if out_paths is not None:
+                part_file_names = [out_path + '.' + str(len(tasks)) for out_path in out_paths]
+            tasks.append((data, start, end, fractions, stratum_index, [seed, len(tasks)], part_file_names))
+        results = _parallel_map(_split_range, tasks, workers)
+        if out_paths is None:
+            return [_concat_chunks(empty, sum([result[j] for result in results], []))
+                    for j in range(len(fractions))]
+
+        # Concatenate the parts of each byte range
+        for j in range(len(out_paths)):
+            with open(out_paths[j], 'wb') as f:
+                _write_header(f, empty)
+                for task in tasks:
+                    with open(task[-1][j], 'rb') as part:
+                        shutil.copyfileobj(part, f)
+                    os.remove(task[-1][j])
+        return [sum([result[j] for result in results]) for j in range(len(fractions))]
+
+    @staticmethod
+    def reservoir_sample(data, n, stratify_by=None, seed=0, workers=None):
+        """
+        Draws a uniform random sample of n rows (without replacement) in a
+        single streaming pass. Each row gets a random key and the n rows with
+        the smallest keys are kept, so memory is O(n). If stratify_by is
+        given, n rows are kept for each label of that nominal attribute
+        and the sample is divided over the labels in proportion to their
+        number of rows. Files are split in byte ranges of RANGE_SIZE whose
+        samples are computed in parallel and merged. Like split(), the sample
+        only depends on the seed, not on the number of workers.
+        :param data: File name, data dictionary or column data dictionary
+        :param n: Sample size
+        :param stratify_by: Name of nominal attribute to stratify by
+        :param seed: Seed
+        :param workers: Number of worker processes (default: number of CPUs)
+        :return: Rows of the sample in their original order, as data of the
+        same kind as the input (column data dictionary for files)
+        """
+        empty = _empty_columns(data)
+        stratum_index = _stratum_index(empty['attributes'], stratify_by)
+        num_strata = 1 if stratum_index is None else len(empty['attributes'][stratum_index][1]) + 1
+
+        if isinstance(data, basestring):
+            if workers is None:
+                workers = multiprocessing.cpu_count()
+            tasks = [(data, start, end, n, stratum_index, num_strata, [seed, i], i)
+                     for i, (start, end) in enumerate(_data_ranges(data))]
+            samples = _parallel_map(_sample_range, tasks, workers)
+            sample = samples[0]
+            for other in samples[1:]:
+                sample.merge(other)
+        else:
+            sample = _sample_chunks(_iter_column_chunks(data), n, stratum_index, num_strata, [seed, 0])
+
+        result = sample.rows(empty, n)
+        if isinstance(data, dict) and 'columns' not in data:
+            return ARFF.from_columns(result)
+        return result
+
+    @staticmethod
+    def scan(data):
+        """
+        Starts a lazy query over an ARFF file, data dictionary or column data
+        dictionary. Operations (select, filter, with_missing, one_hot, join,
+        sort, limit) are only recorded, e.g.,
+
+            ARFF.scan('data.arff').filter('age', '>', 40).select('age', 'class').sink('out.arff')
+
+        When the query is executed by collect(), to_frame() or sink(), only
+        the needed columns are converted, filters are evaluated while reading
+        and all row-wise operations are done in a single pass over chunks of
+        rows, without materializing the whole data set in between. See
+        arff_utils.scan.Scan.
+        :param data: File name, data dictionary or column data dictionary
+        :return: Scan
+        """
+        from .scan import Scan
+        return Scan(data)
+
     @staticmethod
     def to_data_frame(data, index_col=None):
         """
@@ -81,7 +2339,6 @@ class ARFF(object):
         """
         # Create data frame by by taking rows and attributes from 
         # ARFF data. Data types should be automatically inferred
-        rows = data['data']
         columns = [attribute[0] for attribute in data['attributes']]
 
         # Get categorical-type columns
@@ -91,10 +2348,27 @@ class ARFF(object):
             if type(attribute[1]) is list:
                 categoricals.append(column)
 
-        # Create data frame from ARFF dictionary
-        data_frame = pd.DataFrame(rows, columns=columns)
-        for categorical in categoricals:
-            data_frame[categorical] = data_frame[categorical].astype('category')
+        # Create data frame from ARFF dictionary. Column data dictionaries
+        # already contain typed arrays so they do not need to be inferred.
+        # Their nominal and dictionary-encoded columns are converted to
+        # categoricals directly from their codes
+        if 'columns' in data:
+            values = OrderedDict()
+            for i in range(len(columns)):
+                labels = _column_labels(data, i)
+                if labels is None:
+                    values[columns[i]] = data['columns'][i]
+                else:
+                    values[columns[i]] = pd.Categorical.from_codes(data['columns'][i], labels)
+            data_frame = pd.DataFrame(values, columns=columns)
+        else:
+            data_frame = pd.DataFrame(data['data'], columns=columns)
+            for categorical in categoricals:
+                data_frame[categorical] = data_frame[categorical].astype('category')
+            for i in range(len(columns)):
+                attribute_type = data['attributes'][i][1]
+                if _is_date(attribute_type):
+                    data_frame[columns[i]] = _parse_dates(attribute_type, [row[i] for row in data['data']])
 
         # If index column specified, set it
         if index_col is not None:
@@ -131,20 +2405,29 @@ class ARFF(object):
     def from_data_frame(relation, data_frame):
         """
         Converts Pandas data frame to ARFF dictionary. Attribute types are
-        automatically inferred.
+        automatically inferred. Datetime columns become DATE attributes in
+        ISO-8601 format.
         :param relation: Relation name
         :param data_frame: Data frame
         :return: ARFF data dictionary
         """
         attributes = []
+        dates = []
         for name in data_frame.columns:
             column = data_frame[name]
             if column.dtype is np.dtype('int') or column.dtype is np.dtype('float'):
                 attributes.append((name, 'NUMERIC'))
             elif column.dtype is np.dtype('object'):
                 attributes.append((name, 'STRING'))
-            elif column.dtype.name is 'category':
+            elif column.dtype.name == 'category':
                 attributes.append((name, list(column.cat.categories)))
+            elif column.dtype.kind == 'M':
+                attributes.append((name, 'DATE "' + DEFAULT_DATE_FORMAT + '"'))
+                dates.append(name)
+        if len(dates) > 0:
+            data_frame = data_frame.copy()
+            for name in dates:
+                data_frame[name] = _format_dates('DATE', data_frame[name].values)
         data = []
         for row in data_frame.to_records(index=False):
             data.append(list(row))
@@ -156,6 +2439,57 @@ class ARFF(object):
             'description': 'Converted from Pandas data frame'
         }
 
+    @staticmethod
+    def to_columns(data, encode_strings=False, max_dictionary_size=MAX_DICTIONARY_SIZE):
+        """
+        Converts ARFF data dictionary to column data dictionary. Instead of
+        a list of data rows it contains a list of 'columns', one Numpy array
+        per attribute. Numeric attributes are stored as float64 arrays with
+        NaN for missing values. Nominal attributes are stored as int8/int16
+        codes into their list of labels, with -1 for missing values. String
+        attributes are stored as object arrays, unless encode_strings is
+        set. In that case they are dictionary-encoded like nominal columns,
+        and their labels are stored in 'dictionaries'. String columns with
+        more than max_dictionary_size distinct values stay object arrays.
+        :param data: Data dictionary
+        :param encode_strings: Dictionary-encode string attributes
+        :param max_dictionary_size: Maximum number of distinct strings
+        :return: Column data dictionary
+        """
+        attributes = data['attributes']
+        if len(data['data']) > 0:
+            values = list(zip(*data['data']))
+        else:
+            values = [[] for _ in attributes]
+        columns = [_to_column(attributes[i][1], values[i]) for i in range(len(attributes))]
+        dictionaries = [None] * len(attributes)
+        if encode_strings:
+            columns, dictionaries = _encode_string_columns(columns, max_dictionary_size)
+        return {
+            'relation': data['relation'],
+            'attributes': attributes,
+            'columns': columns,
+            'dictionaries': dictionaries,
+            'description': data['description']
+        }
+
+    @staticmethod
+    def from_columns(data):
+        """
+        Converts column data dictionary back to ARFF data dictionary.
+        :param data: Column data dictionary
+        :return: Data dictionary
+        """
+        attributes = data['attributes']
+        values = [_from_column(attributes[i][1], data['columns'][i], _column_labels(data, i))
+                  for i in range(len(attributes))]
+        return {
+            'relation': data['relation'],
+            'attributes': data['attributes'],
+            'data': [list(row) for row in zip(*values)],
+            'description': data['description']
+        }
+
     @staticmethod
     def test():
         data = ARFF.to_data_frame(
@@ -167,26 +2501,178 @@ class ARFF(object):
         """
         Writes ARFF data dictionary to file.
         :param file_name: File name
-        :param data: Data dictionary
+        :param data: Data dictionary or column data dictionary
         :return:
         """
+        if 'columns' in data:
+            data = ARFF.from_columns(data)
         f = open(file_name, 'w')
-        arff.dump(data, f)
+        _dump(data, f)
         f.close()
 
     @staticmethod
-    def write_csv(file_name, data):
+    def append_to_file(file_name, data, fsync=False):
+        """
+        Appends rows to an existing ARFF file without rewriting it. Only the
+        header of the file is read to check the rows against its attributes,
+        so the cost depends on the number of new rows, not on the size of
+        the file. The file is locked while appending (on POSIX systems) so
+        that multiple processes can append to it at the same time.
+        :param file_name: File name
+        :param data: Data dictionary, column data dictionary, data frame or list of rows
+        :param fsync: Force rows to disk before returning
+        :return: Number of rows appended
+        """
+        header = ARFF.read_header(file_name)
+        rows = _rows_for_append(header['attributes'], data)
+        lines = u''.join([_format_row(row) + u'\n' for row in rows]).encode('utf-8')
+        with open(file_name, 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                # Make sure we start on a new line, even if the last line
+                # of the file does not end with a newline
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if not f.read(1) == b'\n':
+                        lines = b'\n' + lines
+                f.seek(0, os.SEEK_END)
+                f.write(lines)
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return len(rows)
+
+    @staticmethod
+    def write_binary(file_name, data, row_group_size=ROW_GROUP_SIZE):
+        """
+        Writes ARFF data dictionary to a binary ARFF file (.arffb). This is
+        much faster to read than text ARFF. The rows are split in row groups
+        and each row group stores its columns as separate buffers aligned
+        to 64 bytes. The header (relation, attributes, description) and the
+        location of each buffer are stored in a JSON footer, followed by
+        its length and the magic bytes.
+        :param file_name: File name
+        :param data: Data dictionary or column data dictionary
+        :param row_group_size: Maximum number of rows per row group
+        :return:
+        """
+        if 'columns' not in data:
+            data = ARFF.to_columns(data)
+        attributes = data['attributes']
+        num_rows = len(data['columns'][0]) if len(data['columns']) > 0 else 0
+        row_groups = []
+        with open(file_name, 'wb') as f:
+            f.write(BINARY_MAGIC)
+            for start in range(0, max(num_rows, 1), row_group_size):
+                end = min(start + row_group_size, num_rows)
+                columns = []
+                for i in range(len(attributes)):
+                    buffers = {}
+                    buffers_i = _to_binary_buffers(attributes[i][1], data['columns'][i][start:end], _column_labels(data, i))
+                    for name, buffer in buffers_i:
+                        f.write(b'\x00' * (-f.tell() % BINARY_ALIGNMENT))
+                        if isinstance(buffer, bytes):
+                            buffers[name] = [f.tell(), len(buffer), '|u1']
+                            f.write(buffer)
+                        else:
+                            buffers[name] = [f.tell(), buffer.nbytes, buffer.dtype.str]
+                            f.write(buffer.tobytes())
+                    columns.append(buffers)
+                row_groups.append({'num_rows': end - start, 'columns': columns})
+            footer = json.dumps({
+                'relation': data['relation'],
+                'attributes': attributes,
+                'dictionaries': data.get('dictionaries'),
+                'description': data['description'],
+                'row_groups': row_groups
+            }).encode('utf-8')
+            f.write(footer)
+            f.write(struct.pack('<Q', len(footer)))
+            f.write(BINARY_MAGIC)
+
+    @staticmethod
+    def read_binary(file_name, columns=None, row_groups=None, output='columns'):
         """
-        Writes ARFF data dictionary to CSV file. Note that this will
-        cause loss of attribute type information. The approach we take
-        here is to first convert to a Pandas data frame and then use the
-        Pandas built-in function to export to CSV.
+        Loads binary ARFF file (.arffb) written by write_binary(). The file
+        is memory-mapped and numeric columns are returned as read-only views
+        on it, i.e., without copying, if only a single row group is read.
+        Optionally, only a subset of the attributes or row groups is read.
+        :param file_name: File name
+        :param columns: Names of attributes to read (default: all)
+        :param row_groups: Indexes of row groups to read (default: all)
+        :param output: Type of output: 'columns', 'frame' or 'dict'
+        :return: Column data dictionary, data frame or data dictionary
+        """
+        if output not in ['columns', 'frame', 'dict']:
+            raise RuntimeError('Invalid output ' + str(output))
+        mm, footer = _open_binary(file_name)
+        attributes = footer['attributes']
+        dictionaries = footer['dictionaries']
+        if columns is None:
+            indexes = list(range(len(attributes)))
+        else:
+            names = [attribute[0] for attribute in attributes]
+            indexes = []
+            for column in columns:
+                if column not in names:
+                    raise RuntimeError('Attribute ' + column + ' not found')
+                indexes.append(names.index(column))
+        if row_groups is None:
+            row_groups = range(len(footer['row_groups']))
+
+        parts = []
+        for i in row_groups:
+            row_group = footer['row_groups'][i]
+            parts.append([_from_binary_buffers(
+                attributes[j][1], row_group['columns'][j], row_group['num_rows'], mm) for j in indexes])
+        if len(parts) == 0:
+            raise RuntimeError('No row groups selected')
+        elif len(parts) == 1:
+            result = parts[0]
+        else:
+            result = [np.concatenate(pieces) for pieces in zip(*parts)]
+
+        data = {
+            'relation': footer['relation'],
+            'attributes': [attributes[j] for j in indexes],
+            'columns': result,
+            'dictionaries': [dictionaries[j] for j in indexes],
+            'description': footer['description']
+        }
+        if output == 'frame':
+            return ARFF.to_data_frame(data)
+        if output == 'dict':
+            return ARFF.from_columns(data)
+        return data
+
+    @staticmethod
+    def write_csv(file_name, data, na_rep='?', quote=True, chunk_size=CHUNK_SIZE):
+        """
+        Writes ARFF data to CSV file. Note that this will cause loss of
+        attribute type information. The data is converted and written in
+        chunks of rows, so converting an ARFF file to CSV takes a constant
+        amount of memory, regardless of its size.
         :param file_name: CSV file name
-        :param data: Data dictionary
+        :param data: ARFF file name, data dictionary or column data dictionary
+        :param na_rep: Representation of missing values
+        :param quote: Quote values containing separators, quotes or line breaks
+        :param chunk_size: Number of rows to convert at once
         :return:
         """
-        data_frame = ARFF.to_data_frame(data)
-        data_frame.to_csv(file_name, na_rep='?', header=True, index=False, sep=',')
+        if isinstance(data, basestring):
+            attributes = ARFF.read_header(data)['attributes']
+        else:
+            attributes = data['attributes']
+        names = [unicode(attribute[0]) for attribute in attributes]
+        with open(file_name, 'wb') as f:
+            f.write((u','.join([_csv_quote(name) if quote else name for name in names]) + u'\n').encode('utf-8'))
+            for chunk in _iter_column_chunks(data, chunk_size):
+                f.write(_csv_lines(chunk, na_rep, quote).encode('utf-8'))
 
     @staticmethod
     def append(data1, data2):
@@ -203,27 +2689,7 @@ class ARFF(object):
 
         # Check whether we have matching attributes
         attributes1 = data1['attributes']
-        attributes2 = data2['attributes']
-        if not len(attributes1) == len(attributes2):
-            raise RuntimeError('Mismatch number of attributes')
-        for i in range(len(attributes1)):
-            attribute1 = attributes1[i]
-            attribute2 = attributes2[i]
-            if not len(attribute1) == 2:
-                raise RuntimeError('Number of attribute1 items != 2')
-            if not len(attribute2) == 2:
-                raise RuntimeError('Number of attribute2 items != 2')
-            if not unicode(attribute1[0]) == unicode(attribute2[0]):
-                raise RuntimeError('Mismatching names at ' + str(i) + ' (' + attribute1[0] + ' vs ' + attribute2[0] + ')')
-            if type(attribute1[1]) is list and type(attribute2[1]) is list:
-                for j in range(len(attribute1[1])):
-                    if not unicode(attribute1[1][j]) == unicode(attribute2[1][j]):
-                        raise RuntimeError('Mismatching nominal values at ('
-                                           + str(i) + ',' + str(j) + ') (' + unicode(attribute1[1][j]) + ' vs ' +
-                                           unicode(attribute2[1][j]) + ')')
-            elif not unicode(attribute1[1]) == unicode(attribute2[1]):
-                raise RuntimeError('Mismatching attribute types (' +
-                                   unicode(attribute1[1]) + ' vs ' + unicode(attribute2[1]) + ')')
+        _check_attributes(attributes1, data2['attributes'])
 
         # Append rows of data2 to rows of data1
         data = []
@@ -231,7 +2697,7 @@ class ARFF(object):
         data.extend(data2['data'])
 
         return {
-            'relation': relation1,
+            'relation': data1['relation'],
             'attributes': attributes1,
             'data': data,
             'description': description
@@ -242,7 +2708,9 @@ class ARFF(object):
         """
         Merges two data sets by appending the columns of data2 associated
         with given attributes to data1. Rows are matched based on the
-        join_by attribute.
+        join_by attribute. If data1 is a column data dictionary, the result
+        is one as well. Rows are then matched on integer codes if join_by
+        is a nominal or dictionary-encoded attribute.
         :param data1: Original data set
         :param data2: Data set whose columns to add
         :param join_by: Attribute for matching data rows
@@ -274,16 +2742,13 @@ class ARFF(object):
         # the corresponding data row in data2.
         join_idx1 = ARFF.index_of(data1, join_by)
         join_idx2 = ARFF.index_of(data2, join_by)
+        attribute_indexes = [ARFF.index_of(data2, attribute) for attribute in attributes]
+        if 'columns' in data1:
+            return _merge_columns(data1, data2, join_idx1, join_idx2, attribute_indexes)
         data2_lookup = {}
         for data_row1 in data2['data']:
             data2_lookup[data_row1[join_idx2]] = data_row1
 
-        # Get indexes associated with given attributes in data2. We need this
-        # to efficiently access specific values in the rows of data2
-        attribute_indexes = []
-        for attribute in attributes:
-            attribute_indexes.append(ARFF.index_of(data2, attribute))
-
         # Create new attribute set by appending the attributes of
         # data set data2. We already checked there are no duplicates.
         attributes_extended = data1['attributes']
@@ -321,7 +2786,7 @@ class ARFF(object):
         the associated column with two or more dummy columns. Note that if
         there are only two levels, they are just converted to zero and one
         instead of creating new columns for them.
-        :param data: ARFF data dictionary
+        :param data: ARFF data dictionary or column data dictionary
         :param attribute: Nominal attribute
         :return: Dummy encoded data dictionary, new attributes
         """
@@ -337,6 +2802,16 @@ class ARFF(object):
         # Get attribute values
         attr_values = data['attributes'][idx][1]
 
+        if 'columns' in data:
+            # Column data dictionaries store nominal values as codes so we
+            # can compare integers instead of strings
+            dummy_attributes, dummy_columns = _dummy_columns(attribute, attr_values, data['columns'][idx])
+            data['attributes'][idx:idx + 1] = dummy_attributes
+            data['columns'][idx:idx + 1] = dummy_columns
+            if data.get('dictionaries') is not None:
+                data['dictionaries'][idx:idx + 1] = [None] * len(dummy_columns)
+            return data, [dummy_attribute[0] for dummy_attribute in dummy_attributes]
+
         if len(attr_values) == 2:
             # If we're dealing with a binominal attribute there's no need
             # to split it up in separate dummy columns. Just convert the
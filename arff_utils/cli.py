@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Command-line interface for ARFF utilities, installed as 'arff-utils'. The
+header and text based commands (head, schema, count, concat) never load
+Numpy or Pandas, so they start fast enough to be called from shell
+pipelines many times.
+"""
+__author__ = 'Ralph'
+
+import argparse
+import errno
+import json
+import os
+import re
+import sys
+
+from .arff_utils import ARFF, arff, _read_header_lines
+
+
+def head(args):
+    """
+    Prints header and first rows of ARFF file as is, without parsing them.
+    """
+    with open(args.file) as f:
+        for line in _read_header_lines(f):
+            sys.stdout.write(line)
+        num_rows = 0
+        while num_rows < args.n:
+            line = f.readline()
+            if not line:
+                break
+            stripped = line.strip()
+            if stripped and not stripped.startswith('%'):
+                sys.stdout.write(line)
+                num_rows += 1
+
+
+def schema(args):
+    """
+    Prints relation and attributes of ARFF file, one attribute per line.
+    """
+    header = ARFF.read_header(args.file)
+    print('@relation ' + header['relation'])
+    for name, attribute_type in header['attributes']:
+        if type(attribute_type) is list:
+            attribute_type = '{' + ','.join(attribute_type) + '}'
+        print(name + '\t' + attribute_type)
+
+
+def count(args):
+    """
+    Prints number of data rows of each ARFF file.
+    """
+    for file_name in args.files:
+        if len(args.files) > 1:
+            print(file_name + '\t' + str(ARFF.count(file_name)))
+        else:
+            print(ARFF.count(file_name))
+
+
+def convert(args):
+    """
+    Converts between text ARFF (.arff), binary ARFF (.arffb) and CSV (.csv)
+    files based on their extensions.
+    """
+    if args.input.endswith('.arffb'):
+        data = ARFF.read_binary(args.input)
+    elif args.output.endswith('.csv'):
+        data = args.input
+    else:
+        data = ARFF.read_columns(args.input)
+    if args.output.endswith('.csv'):
+        ARFF.write_csv(args.output, data)
+    elif args.output.endswith('.arffb'):
+        ARFF.write_binary(args.output, data)
+    else:
+        ARFF.write(args.output, data)
+
+
+def concat(args):
+    """
+    Concatenates ARFF files with identical attributes.
+    """
+    ARFF.concat(args.files, args.output)
+
+
+def merge(args):
+    """
+    Adds attributes of second ARFF file to first one, matching rows by the
+    given join attribute.
+    """
+    data = ARFF.merge(ARFF.read_columns(args.file1), ARFF.read_columns(args.file2), args.on, args.attributes)
+    ARFF.write(args.output, data)
+
+
+def stats(args):
+    """
+    Prints summary statistics of each attribute as JSON.
+    """
+    files = args.files[0] if len(args.files) == 1 and not os.path.isfile(args.files[0]) else args.files
+    summary = ARFF.describe(files, workers=args.workers)
+    print(json.dumps(summary, indent=2, default=str))
+
+
+def main(argv=None):
+    """
+    Runs the command given by the command-line arguments.
+    :param argv: Command-line arguments (default: sys.argv[1:])
+    :return: Exit code
+    """
+    parser = argparse.ArgumentParser(prog='arff-utils', description='Utilities for ARFF files')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    parser_head = commands.add_parser('head', help='print header and first rows')
+    parser_head.add_argument('file')
+    parser_head.add_argument('-n', type=int, default=10, help='number of rows (default: 10)')
+    parser_head.set_defaults(function=head)
+
+    parser_schema = commands.add_parser('schema', help='print relation and attributes')
+    parser_schema.add_argument('file')
+    parser_schema.set_defaults(function=schema)
+
+    parser_count = commands.add_parser('count', help='print number of rows')
+    parser_count.add_argument('files', nargs='+')
+    parser_count.set_defaults(function=count)
+
+    parser_convert = commands.add_parser('convert', help='convert between .arff, .arffb and .csv')
+    parser_convert.add_argument('input')
+    parser_convert.add_argument('output')
+    parser_convert.set_defaults(function=convert)
+
+    parser_concat = commands.add_parser('concat', help='concatenate files with identical attributes')
+    parser_concat.add_argument('files', nargs='+')
+    parser_concat.add_argument('-o', '--output', required=True)
+    parser_concat.set_defaults(function=concat)
+
+    parser_merge = commands.add_parser('merge', help='add attributes of file2 to file1')
+    parser_merge.add_argument('file1')
+    parser_merge.add_argument('file2')
+    parser_merge.add_argument('--on', required=True, help='join attribute')
+    parser_merge.add_argument('--attributes', nargs='+', required=True, help='attributes of file2 to add')
+    parser_merge.add_argument('-o', '--output', required=True)
+    parser_merge.set_defaults(function=merge)
+
+    parser_stats = commands.add_parser('stats', help='print attribute statistics')
+    parser_stats.add_argument('files', nargs='+', help='file names or glob pattern')
+    parser_stats.add_argument('--workers', type=int, default=None, help='number of worker processes')
+    parser_stats.set_defaults(function=stats)
+
+    args = parser.parse_args(argv)
+    try:
+        args.function(args)
+    except (IOError, RuntimeError, ValueError, arff.ArffException) as e:
+        if getattr(e, 'errno', None) == errno.EPIPE:
+            # Output was closed early, e.g., by piping it into 'head'
+            return 0
+        message = str(e)
+        if isinstance(e, arff.ArffException) and e.line < 0:
+            # Errors in data rows are raised while the rows are streamed,
+            # when liac-arff no longer knows the line number
+            message = re.sub(r',? (?:at|in) line -1', '', message)
+        sys.stderr.write('arff-utils: error: ' + message + '\n')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+
+    sys.exit(main())
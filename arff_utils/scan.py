@@ -0,0 +1,951 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy queries over ARFF data (see ARFF.scan()). A Scan only records its
+operations. When it is executed, the plan is optimized first: filters are
+moved as close to the source as possible and evaluated by the reader before
+the other columns are converted, and the reader only converts the columns
+that are needed by the rest of the plan. All row-wise operations then run
+in a single chunked pass. Only sort, and joins with a large right-hand side,
+need to see all rows before producing output. They write their rows to
+temporary binary ARFF files once they exceed the given number of rows.
+"""
+__author__ = 'Ralph'
+
+import itertools
+import operator
+import os
+import shutil
+import tempfile
+import time
+
+from .arff_utils import ARFF, CHUNK_SIZE, arff, np, _binary_strings, _column_hashes, _column_labels, \
+    _concat_chunks, _csv_lines, _csv_quote, _decode_labels, _decode_strings, _dummy_columns, _from_binary_buffers, \
+    _from_column, _is_date, _is_nat, _is_numeric, _iter_column_chunks, _load, _num_rows, _open_binary, \
+    _parse_dates, _select_rows, _to_column, _write_header, _write_rows
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+try:
+    unicode
+except NameError:
+    unicode = str
+
+SPILL_ROWS = 1000000
+
+_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge
+}
+
+
+def _index_of(attributes, attribute):
+    """
+    Returns index of attribute or raises an error if it does not exist.
+    :param attributes: Attributes
+    :param attribute: Attribute name
+    :return: Index
+    """
+    for i in range(len(attributes)):
+        if attributes[i][0] == attribute:
+            return i
+    raise RuntimeError('Attribute ' + unicode(attribute) + ' not found')
+
+
+def _empty(relation, attributes, description):
+    """
+    Returns column data dictionary without rows.
+    :param relation: Relation name
+    :param attributes: Attributes
+    :param description: Description
+    :return: Column data dictionary
+    """
+    return ARFF.to_columns({'relation': relation, 'attributes': attributes, 'data': [], 'description': description})
+
+
+def _spill_file(spill_dir, prefix):
+    """
+    Creates a new temporary file for spilled rows. The spill directory is
+    shared by all operations of a plan (and the plans of joined scans), so
+    every file gets a unique name.
+    :param spill_dir: Directory for temporary files
+    :param prefix: Prefix of file name
+    :return: File name
+    """
+    fd, file_name = tempfile.mkstemp(suffix='.arffb', prefix=prefix, dir=spill_dir)
+    os.close(fd)
+    return file_name
+
+
+def _valid(attribute_type, column, labels):
+    """
+    Returns which values of a column are not missing.
+    :param attribute_type: ARFF attribute type or list of nominal values
+    :param column: Numpy array
+    :param labels: Labels of nominal or dictionary-encoded column
+    :return: Boolean Numpy array
+    """
+    if labels is not None:
+        return column >= 0
+    if _is_numeric(attribute_type):
+        return ~np.isnan(column)
+    if _is_date(attribute_type):
+        return ~_is_nat(column)
+    return np.array([value is not None for value in column], dtype=bool)
+
+
+class _Operation(object):
+    """
+    Operation of a Scan. Row-wise operations implement apply(), which
+    transforms a single chunk, blocking operations override run().
+    """
+
+    def schema(self, attributes):
+        """
+        Checks operation against its input attributes.
+        :param attributes: Input attributes
+        :return: Output attributes
+        """
+        return attributes
+
+    def needed(self, names):
+        """
+        Returns the input attributes needed to produce the given output
+        attributes (None means all).
+        :param names: Set of output attribute names or None
+        :return: Set of input attribute names or None
+        """
+        return names
+
+    def commutes_with(self, other):
+        """
+        Checks whether filter other can be executed before this operation
+        without changing the result.
+        :param other: Filter
+        :return: True/False
+        """
+        return False
+
+    def apply(self, chunk):
+        return chunk
+
+    def run(self, chunks, stats, spill_dir):
+        """
+        Executes operation on a stream of chunks.
+        :param chunks: Column data dictionaries
+        :param stats: List [rows, seconds] to update
+        :param spill_dir: Directory for temporary files
+        :return: Generator of column data dictionaries
+        """
+        for chunk in chunks:
+            start = time.time()
+            chunk = self.apply(chunk)
+            stats[0] += _num_rows(chunk)
+            stats[1] += time.time() - start
+            yield chunk
+
+
+class _Select(_Operation):
+
+    def __init__(self, attributes):
+        self.attributes = list(attributes)
+
+    def __str__(self):
+        return 'SELECT ' + ', '.join(self.attributes)
+
+    def schema(self, attributes):
+        return [attributes[_index_of(attributes, attribute)] for attribute in self.attributes]
+
+    def needed(self, names):
+        if names is None:
+            return set(self.attributes)
+        return set([attribute for attribute in self.attributes if attribute in names])
+
+    def commutes_with(self, other):
+        return True
+
+    def apply(self, chunk):
+        indexes = [_index_of(chunk['attributes'], attribute) for attribute in self.attributes]
+        result = dict(chunk)
+        result['attributes'] = [chunk['attributes'][i] for i in indexes]
+        result['columns'] = [chunk['columns'][i] for i in indexes]
+        result['dictionaries'] = [chunk['dictionaries'][i] for i in indexes]
+        return result
+
+
+class _Filter(_Operation):
+
+    def __init__(self, attribute, op, value):
+        if op not in _OPERATORS and op not in ['in', 'not in']:
+            raise RuntimeError('Invalid operator ' + unicode(op))
+        if op in ['in', 'not in'] and not isinstance(value, (list, tuple, set)):
+            raise RuntimeError('Operator ' + op + ' expects a list of values')
+        self.attribute = attribute
+        self.op = op
+        self.value = value
+
+    def __str__(self):
+        return self.attribute + ' ' + self.op + ' ' + repr(self.value)
+
+    def schema(self, attributes):
+        attribute_type = attributes[_index_of(attributes, self.attribute)][1]
+        if type(attribute_type) is list and self.op not in ['==', '!=', 'in', 'not in']:
+            raise RuntimeError('Operator ' + self.op + ' not supported for nominal attribute ' + self.attribute)
+        return attributes
+
+    def needed(self, names):
+        return None if names is None else names | set([self.attribute])
+
+    def commutes_with(self, other):
+        return True
+
+    def mask(self, attribute_type, column, labels):
+        """
+        Evaluates filter on a column. Missing values never match.
+        :param attribute_type: ARFF attribute type or list of nominal values
+        :param column: Numpy array
+        :param labels: Labels of nominal or dictionary-encoded column
+        :return: Boolean Numpy array
+        """
+        values = list(self.value) if self.op in ['in', 'not in'] else [self.value]
+        valid = _valid(attribute_type, column, labels)
+        if labels is not None:
+            codes = [i for i in range(len(labels)) if labels[i] in values]
+            mask = np.isin(column, codes)
+            return valid & ~mask if self.op in ['!=', 'not in'] else mask
+        if _is_date(attribute_type):
+            values = [_parse_dates(attribute_type, [value])[0] if isinstance(value, basestring)
+                      else np.datetime64(value, 'ns') for value in values]
+        if column.dtype == object:
+            if self.op in ['in', 'not in']:
+                mask = np.array([value in values for value in column], dtype=bool)
+            else:
+                compare = _OPERATORS[self.op]
+                mask = np.array([value is not None and compare(value, values[0]) for value in column], dtype=bool)
+        elif self.op in ['in', 'not in']:
+            mask = np.isin(column, values)
+        else:
+            with np.errstate(invalid='ignore'):
+                mask = _OPERATORS[self.op](column, values[0])
+        if self.op == 'not in':
+            mask = ~mask
+        return mask & valid
+
+    def apply(self, chunk):
+        i = _index_of(chunk['attributes'], self.attribute)
+        return _select_rows(chunk, self.mask(chunk['attributes'][i][1], chunk['columns'][i],
+                                             _column_labels(chunk, i)))
+
+
+class _WithMissing(_Operation):
+
+    def __init__(self, missing):
+        if isinstance(missing, basestring):
+            missing = [missing]
+        elif not isinstance(missing, list):
+            raise RuntimeError('Invalid type for \'missing\' parameter ' + str(type(missing)))
+        self.missing = missing
+
+    def __str__(self):
+        return 'WITH_MISSING ' + ', '.join([repr(value) for value in self.missing])
+
+    def apply(self, chunk):
+        numbers = []
+        for value in self.missing:
+            try:
+                numbers.append(float(value))
+            except (TypeError, ValueError):
+                pass
+        result = dict(chunk)
+        result['columns'] = list(chunk['columns'])
+        for i in range(len(chunk['attributes'])):
+            attribute_type = chunk['attributes'][i][1]
+            column = chunk['columns'][i]
+            labels = _column_labels(chunk, i)
+            if labels is not None:
+                codes = [j for j in range(len(labels)) if labels[j] in self.missing]
+                mask = np.isin(column, codes)
+            elif _is_numeric(attribute_type):
+                mask = np.isin(column, numbers)
+            elif column.dtype == object:
+                mask = np.array([value in self.missing for value in column], dtype=bool)
+            else:
+                continue
+            if mask.any():
+                column = column.copy()
+                column[mask] = -1 if labels is not None else np.nan if column.dtype.kind == 'f' else None
+                result['columns'][i] = column
+        return result
+
+
+class _OneHot(_Operation):
+
+    def __init__(self, attribute):
+        self.attribute = attribute
+        self.labels = None
+
+    def __str__(self):
+        return 'ONE_HOT ' + self.attribute
+
+    def produced(self):
+        return [self.attribute] if len(self.labels) == 2 else list(self.labels)
+
+    def schema(self, attributes):
+        i = _index_of(attributes, self.attribute)
+        if not type(attributes[i][1]) is list:
+            raise RuntimeError('Attribute ' + self.attribute + ' is not nominal')
+        self.labels = attributes[i][1]
+        return attributes[:i] + [(name, 'NUMERIC') for name in self.produced()] + attributes[i + 1:]
+
+    def needed(self, names):
+        if names is None:
+            return None
+        produced = set(self.produced())
+        return (names - produced) | set([self.attribute])
+
+    def commutes_with(self, other):
+        return other.attribute != self.attribute and other.attribute not in self.produced()
+
+    def apply(self, chunk):
+        i = _index_of(chunk['attributes'], self.attribute)
+        attributes, columns = _dummy_columns(self.attribute, self.labels, chunk['columns'][i])
+        result = dict(chunk)
+        result['attributes'] = chunk['attributes'][:i] + attributes + chunk['attributes'][i + 1:]
+        result['columns'] = chunk['columns'][:i] + columns + chunk['columns'][i + 1:]
+        result['dictionaries'] = chunk['dictionaries'][:i] + [None] * len(columns) + chunk['dictionaries'][i + 1:]
+        return result
+
+
+class _SpilledStrings(object):
+    """
+    String column of a spilled part of a join table. Its offsets and bytes
+    stay in the memory-mapped file and strings are only decoded for the rows
+    that are fetched.
+    """
+    dtype = np.dtype(object)
+
+    def __init__(self, buffers, num_rows, mm):
+        self.strings = _binary_strings(buffers, mm)
+        self.num_rows = num_rows
+
+    def __len__(self):
+        return self.num_rows
+
+    def __getitem__(self, rows):
+        return _decode_strings(self.strings, rows)
+
+
+class _JoinTable(object):
+    """
+    Right-hand side of a join: the rows to add and a lookup of join key to
+    row number. The lookup holds the sorted 64-bit hashes of the keys (see
+    _column_hashes()) and keys with the same hash are compared by their
+    values. Of rows with the same key, the last one is used. Rows are kept
+    in memory up to spill_rows rows. Beyond that, they are written to
+    temporary binary ARFF files in batches and read back memory-mapped.
+    """
+    def __init__(self, scan, spill_rows, spill_dir):
+        self.parts = []
+        self.offsets = [0]
+        self.spilled = False
+        empty = scan._empty()
+        self.key_type = empty['attributes'][0][1]
+        self.key_labels = _column_labels(empty, 0)
+        hashes = [np.empty(0, dtype=np.uint64)]
+        rows = [np.empty(0, dtype=np.int64)]
+        batch = []
+        num_batched = 0
+        for chunk in scan._execute(spill_dir, []):
+            labels = _column_labels(chunk, 0)
+            valid = _valid(self.key_type, chunk['columns'][0], labels)
+            hashes.append(_column_hashes(self.key_type, chunk['columns'][0], labels)[valid])
+            rows.append(self.offsets[-1] + num_batched + np.flatnonzero(valid))
+            batch.append(chunk)
+            num_batched += _num_rows(chunk)
+            if num_batched >= spill_rows:
+                self.spilled = True
+                self._add(_concat_chunks(empty, batch), spill_dir)
+                batch = []
+                num_batched = 0
+        if num_batched > 0 or len(self.parts) == 0:
+            self._add(_concat_chunks(empty, batch), spill_dir)
+
+        hashes = np.concatenate(hashes)
+        order = np.argsort(hashes, kind='mergesort')
+        hashes = hashes[order]
+        last = np.append(hashes[1:] != hashes[:-1], True)
+        self.hashes = hashes[last]
+        self.rows = np.concatenate(rows)[order][last]
+
+    def _add(self, part, spill_dir):
+        if self.spilled:
+            file_name = _spill_file(spill_dir, 'join')
+            num_rows = _num_rows(part)
+            ARFF.write_binary(file_name, part, row_group_size=max(num_rows, 1))
+            mm, footer = _open_binary(file_name)
+            buffers = footer['row_groups'][0]['columns']
+            part = dict(part)
+            part['columns'] = [_SpilledStrings(buffers[j], num_rows, mm) if 'offsets' in buffers[j] else
+                               _from_binary_buffers(part['attributes'][j][1], buffers[j], num_rows, mm)
+                               for j in range(len(buffers))]
+        self.parts.append(part)
+        self.offsets.append(self.offsets[-1] + _num_rows(part))
+
+    def find(self, attribute_type, column, labels):
+        """
+        Looks up the rows of the given join keys.
+        :param attribute_type: ARFF attribute type or list of nominal values
+        :param column: Column of join keys
+        :param labels: Labels of nominal or dictionary-encoded column
+        :return: Row numbers (-1 if not found)
+        """
+        rows = np.full(len(column), -1, dtype=np.int64)
+        if len(self.hashes) == 0:
+            return rows
+        hashes = _column_hashes(attribute_type, column, labels)
+        positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        found = np.flatnonzero((self.hashes[positions] == hashes) & _valid(attribute_type, column, labels))
+        matches = self.rows[positions[found]]
+        keys = np.array(_from_column(attribute_type, column[found], labels), dtype=object)
+        other = np.array(_from_column(self.key_type, self.column(0, matches), self.key_labels), dtype=object)
+        equal = keys == other
+        rows[found[equal]] = matches[equal]
+        return rows
+
+    def column(self, j, rows):
+        """
+        Returns values of the j-th column for the given row numbers.
+        :param j: Column index
+        :param rows: Row numbers
+        :return: Numpy array
+        """
+        if len(self.parts) == 1:
+            return self.parts[0]['columns'][j][rows]
+        column = np.empty(len(rows), dtype=self.parts[0]['columns'][j].dtype)
+        for k in range(len(self.parts)):
+            selected = (rows >= self.offsets[k]) & (rows < self.offsets[k + 1])
+            column[selected] = self.parts[k]['columns'][j][rows[selected] - self.offsets[k]]
+        return column
+
+
+class _Join(_Operation):
+
+    def __init__(self, other, on, attributes, spill_rows):
+        self.other = other.select(on, *attributes)
+        self.on = on
+        self.attributes = list(attributes)
+        self.spill_rows = spill_rows
+
+    def __str__(self):
+        return 'JOIN ' + self.other._name() + ' ON ' + self.on + ' ADD ' + ', '.join(self.attributes)
+
+    def schema(self, attributes):
+        _index_of(attributes, self.on)
+        names = [attribute[0] for attribute in attributes]
+        for attribute in self.attributes:
+            if attribute in names:
+                raise RuntimeError('Attribute ' + attribute + ' already exists')
+        return attributes + self.other.attributes[1:]
+
+    def needed(self, names):
+        if names is None:
+            return None
+        return (names - set(self.attributes)) | set([self.on])
+
+    def commutes_with(self, other):
+        return other.attribute not in self.attributes
+
+    def run(self, chunks, stats, spill_dir):
+        start = time.time()
+        table = _JoinTable(self.other, self.spill_rows, spill_dir)
+        stats[1] += time.time() - start
+        for chunk in chunks:
+            start = time.time()
+            i = _index_of(chunk['attributes'], self.on)
+            rows = table.find(chunk['attributes'][i][1], chunk['columns'][i], _column_labels(chunk, i))
+            found = rows >= 0
+            result = _select_rows(chunk, found)
+            result['attributes'] = chunk['attributes'] + self.other.attributes[1:]
+            result['columns'] += [table.column(j, rows[found]) for j in range(1, len(self.other.attributes))]
+            result['dictionaries'] = chunk['dictionaries'] + [None] * len(self.attributes)
+            stats[0] += _num_rows(result)
+            stats[1] += time.time() - start
+            yield result
+
+
+class _RunReader(object):
+    """
+    Reads the rows of a sorted run (a temporary binary ARFF file) in order,
+    one row group at a time. The file is memory-mapped and its footer read
+    only once.
+    """
+    def __init__(self, file_name):
+        self.mm, self.footer = _open_binary(file_name)
+        self.row_group = 0
+        self.buffer = None
+        self.position = 0
+
+    def _read(self):
+        row_group = self.footer['row_groups'][self.row_group]
+        attributes = self.footer['attributes']
+        return {
+            'relation': self.footer['relation'],
+            'attributes': attributes,
+            'columns': [_from_binary_buffers(attributes[j][1], row_group['columns'][j], row_group['num_rows'], self.mm)
+                        for j in range(len(attributes))],
+            'dictionaries': self.footer['dictionaries'],
+            'description': self.footer['description']
+        }
+
+    def take(self, num_rows):
+        """
+        Reads the next rows.
+        :param num_rows: Number of rows
+        :return: List of column data dictionaries
+        """
+        parts = []
+        while num_rows > 0:
+            if self.buffer is None or self.position == _num_rows(self.buffer):
+                self.buffer = self._read()
+                self.row_group += 1
+                self.position = 0
+            end = min(self.position + num_rows, _num_rows(self.buffer))
+            parts.append(_select_rows(self.buffer, slice(self.position, end)))
+            num_rows -= end - self.position
+            self.position = end
+        return parts
+
+
+class _Sort(_Operation):
+
+    def __init__(self, attribute, descending, spill_rows):
+        self.attribute = attribute
+        self.descending = descending
+        self.spill_rows = spill_rows
+
+    def __str__(self):
+        return 'SORT BY ' + self.attribute + (' DESC' if self.descending else '') + \
+               ' (blocking, spills after {} rows)'.format(self.spill_rows)
+
+    def schema(self, attributes):
+        _index_of(attributes, self.attribute)
+        return attributes
+
+    def needed(self, names):
+        return None if names is None else names | set([self.attribute])
+
+    def commutes_with(self, other):
+        return True
+
+    def _keys(self, chunk):
+        # Values to sort by and whether they are not missing. Nominal
+        # values are sorted by label, like ARFF.sort_by().
+        i = _index_of(chunk['attributes'], self.attribute)
+        column = chunk['columns'][i]
+        labels = _column_labels(chunk, i)
+        valid = _valid(chunk['attributes'][i][1], column, labels)
+        if labels is not None:
+            ranks = np.zeros(len(labels) + 1, dtype=np.int64)
+            ranks[sorted(range(len(labels)), key=lambda j: labels[j])] = np.arange(len(labels))
+            column = ranks[column]
+        return column, valid
+
+    def _order(self, keys, valid):
+        # Stable order of the rows, with missing values last
+        ranks = np.full(len(keys), len(keys), dtype=np.int64)
+        if valid.any():
+            ranks[valid] = np.unique(keys[valid], return_inverse=True)[1].ravel()
+            if self.descending:
+                ranks[valid] = ranks[valid].max() - ranks[valid]
+        return np.argsort(ranks, kind='mergesort')
+
+    def run(self, chunks, stats, spill_dir):
+        batch = []
+        num_batched = 0
+        runs = []
+        empty = None
+        for chunk in chunks:
+            start = time.time()
+            if empty is None:
+                empty = _select_rows(chunk, slice(0, 0))
+            batch.append(chunk)
+            num_batched += _num_rows(chunk)
+            if num_batched >= self.spill_rows:
+                runs.append(self._spill(_concat_chunks(empty, batch), spill_dir))
+                batch = []
+                num_batched = 0
+            stats[1] += time.time() - start
+        if empty is None:
+            return
+
+        start = time.time()
+        if len(runs) == 0:
+            data = _concat_chunks(empty, batch)
+            data = _select_rows(data, self._order(*self._keys(data)))
+            stats[1] += time.time() - start
+            for position in range(0, _num_rows(data), CHUNK_SIZE):
+                chunk = _select_rows(data, slice(position, position + CHUNK_SIZE))
+                stats[0] += _num_rows(chunk)
+                yield chunk
+            return
+
+        # Merge the sorted runs. Their keys are in memory, so the order of
+        # all rows is known and each run is read once, front to back.
+        if num_batched > 0:
+            runs.append(self._spill(_concat_chunks(empty, batch), spill_dir))
+        keys = np.concatenate([run[1] for run in runs])
+        valid = np.concatenate([run[2] for run in runs])
+        run_ids = np.repeat(np.arange(len(runs)), [len(run[1]) for run in runs])[self._order(keys, valid)]
+        readers = [_RunReader(run[0]) for run in runs]
+        stats[1] += time.time() - start
+        for position in range(0, len(run_ids), CHUNK_SIZE):
+            start = time.time()
+            ids = run_ids[position:position + CHUNK_SIZE]
+            parts = []
+            for j in np.unique(ids):
+                parts.extend(readers[j].take(int((ids == j).sum())))
+            chunk = _concat_chunks(empty, parts)
+            chunk = _select_rows(chunk, np.argsort(np.argsort(ids, kind='mergesort'), kind='mergesort'))
+            stats[0] += _num_rows(chunk)
+            stats[1] += time.time() - start
+            yield chunk
+
+    def _spill(self, data, spill_dir):
+        keys, valid = self._keys(data)
+        order = self._order(keys, valid)
+        file_name = _spill_file(spill_dir, 'sort')
+        ARFF.write_binary(file_name, _select_rows(data, order), row_group_size=CHUNK_SIZE)
+        return file_name, keys[order], valid[order]
+
+
+class _Limit(_Operation):
+
+    def __init__(self, n):
+        self.n = n
+
+    def __str__(self):
+        return 'LIMIT ' + str(self.n)
+
+    def run(self, chunks, stats, spill_dir):
+        remaining = self.n
+        if remaining <= 0:
+            return
+        for chunk in chunks:
+            start = time.time()
+            chunk = _select_rows(chunk, slice(0, remaining))
+            remaining -= _num_rows(chunk)
+            stats[0] += _num_rows(chunk)
+            stats[1] += time.time() - start
+            yield chunk
+            if remaining <= 0:
+                # Stop reading, rows after this are not needed
+                return
+
+
+class _Reader(object):
+    """
+    Source of a Scan. It converts only the given columns and evaluates the
+    filters pushed down to it first, so the other columns are only
+    converted for the rows that pass them.
+    """
+    def __init__(self, name, source, attributes, columns, filters):
+        self.name = name
+        self.source = source
+        self.attributes = attributes
+        self.columns = columns
+        self.filters = filters
+
+    def __str__(self):
+        text = 'SCAN ' + self.name
+        if self.columns is not None:
+            text += ' COLUMNS [' + ', '.join([a[0] for a in self.attributes if a[0] in self.columns]) + ']'
+        if len(self.filters) > 0:
+            text += ' FILTER [' + ' AND '.join([str(f) for f in self.filters]) + ']'
+        return text
+
+    def run(self, stats):
+        """
+        Reads source in chunks.
+        :param stats: List [rows, seconds] to update
+        :return: Generator of column data dictionaries
+        """
+        indexes = [i for i in range(len(self.attributes))
+                   if self.columns is None or self.attributes[i][0] in self.columns]
+        if isinstance(self.source, basestring):
+            chunks = self._read(indexes, stats)
+        else:
+            chunks = self._select(indexes, stats)
+        for chunk in chunks:
+            stats[0] += _num_rows(chunk)
+            yield chunk
+
+    def _read(self, indexes, stats):
+        with open(self.source) as f:
+            data = _load(f, arff.DENSE_GEN)
+            while True:
+                start = time.time()
+                rows = list(itertools.islice(data['data'], CHUNK_SIZE))
+                if len(rows) == 0:
+                    break
+                values = list(zip(*rows))
+                converted = {}
+                keep = None
+                for f in self.filters:
+                    i = _index_of(self.attributes, f.attribute)
+                    attribute_type = self.attributes[i][1]
+                    labels = attribute_type if type(attribute_type) is list else None
+                    if i not in converted:
+                        converted[i] = _to_column(attribute_type, values[i])
+                    mask = f.mask(attribute_type, converted[i], labels)
+                    keep = mask if keep is None else keep & mask
+                columns = []
+                for i in indexes:
+                    if i in converted:
+                        columns.append(converted[i] if keep is None else converted[i][keep])
+                    elif keep is None:
+                        columns.append(_to_column(self.attributes[i][1], values[i]))
+                    else:
+                        columns.append(_to_column(self.attributes[i][1], list(itertools.compress(values[i], keep))))
+                chunk = {
+                    'relation': data['relation'],
+                    'attributes': [self.attributes[i] for i in indexes],
+                    'columns': columns,
+                    'dictionaries': [None] * len(indexes),
+                    'description': data['description']
+                }
+                stats[1] += time.time() - start
+                yield chunk
+
+    def _select(self, indexes, stats):
+        for chunk in _iter_column_chunks(self.source):
+            start = time.time()
+            for f in self.filters:
+                chunk = f.apply(chunk)
+            # Dictionary-encoded strings are decoded so all chunks of the
+            # scan have the same dictionaries (none)
+            dictionaries = chunk.get('dictionaries') or [None] * len(chunk['columns'])
+            chunk = {
+                'relation': chunk['relation'],
+                'attributes': [self.attributes[i] for i in indexes],
+                'columns': [chunk['columns'][i] if dictionaries[i] is None
+                            else _decode_labels(chunk['columns'][i], dictionaries[i]) for i in indexes],
+                'dictionaries': [None] * len(indexes),
+                'description': chunk['description']
+            }
+            stats[1] += time.time() - start
+            yield chunk
+
+
+class Scan(object):
+    """
+    Lazy query over an ARFF file, data dictionary or column data dictionary,
+    created by ARFF.scan(). Each method returns a new Scan with an additional
+    operation. Nothing is read until collect(), to_frame() or sink() is
+    called. explain() shows the optimized plan.
+    """
+    def __init__(self, source):
+        header = ARFF.read_header(source) if isinstance(source, basestring) else source
+        self._source = source
+        self._relation = header['relation']
+        self._description = header.get('description', '')
+        self._source_attributes = [tuple(attribute) for attribute in header['attributes']]
+        self._operations = []
+        self._stats = None
+        self.attributes = self._source_attributes
+
+    def _with(self, operation):
+        scan = Scan.__new__(Scan)
+        scan.__dict__.update(self.__dict__)
+        scan.attributes = operation.schema(self.attributes)
+        scan._operations = self._operations + [operation]
+        scan._stats = None
+        return scan
+
+    def select(self, *attributes):
+        """
+        Keeps only the given attributes, in the given order.
+        :param attributes: Attribute names
+        :return: Scan
+        """
+        return self._with(_Select(attributes))
+
+    def filter(self, attribute, op, value):
+        """
+        Keeps rows whose value of the given attribute matches. Rows with a
+        missing value never match.
+        :param attribute: Attribute name
+        :param op: Operator ('==', '!=', '<', '<=', '>', '>=', 'in' or 'not in')
+        :param value: Value to compare with (list of values for 'in' and 'not in')
+        :return: Scan
+        """
+        return self._with(_Filter(attribute, op, value))
+
+    def with_missing(self, missing):
+        """
+        Treats the given values as missing, like the missing parameter of
+        ARFF.read().
+        :param missing: Missing value representation or list of them
+        :return: Scan
+        """
+        return self._with(_WithMissing(missing))
+
+    def one_hot(self, attribute):
+        """
+        Replaces nominal attribute by numeric dummy columns, like
+        ARFF.dummy_encode().
+        :param attribute: Nominal attribute
+        :return: Scan
+        """
+        return self._with(_OneHot(attribute))
+
+    def join(self, other, on, attributes, spill_rows=SPILL_ROWS):
+        """
+        Adds attributes of other data set, matching rows by the join
+        attribute, like ARFF.merge(). Rows without a match are dropped. The
+        other data set is read completely first. If it has more than
+        spill_rows rows, its rows are kept in temporary files on disk.
+        :param other: Scan, file name, data dictionary or column data dictionary
+        :param on: Join attribute
+        :param attributes: Attributes of other data set to add
+        :param spill_rows: Maximum number of rows of other data set to keep in memory
+        :return: Scan
+        """
+        if not isinstance(other, Scan):
+            other = Scan(other)
+        return self._with(_Join(other, on, attributes, spill_rows))
+
+    def sort(self, attribute, descending=False, spill_rows=SPILL_ROWS):
+        """
+        Sorts rows by given attribute (stable, missing values last). If
+        there are more than spill_rows rows, they are sorted in runs that
+        are written to temporary files and merged, so only the values of the
+        attribute are kept in memory.
+        :param attribute: Attribute to sort by
+        :param descending: Sort in descending order
+        :param spill_rows: Maximum number of rows to keep in memory
+        :return: Scan
+        """
+        return self._with(_Sort(attribute, descending, spill_rows))
+
+    def limit(self, n):
+        """
+        Keeps only the first n rows. Reading stops once they are found.
+        :param n: Number of rows
+        :return: Scan
+        """
+        return self._with(_Limit(n))
+
+    def collect(self):
+        """
+        Executes the scan.
+        :return: Column data dictionary
+        """
+        return _concat_chunks(self._empty(), self._chunks())
+
+    def to_frame(self, index_col=None):
+        """
+        Executes the scan.
+        :param index_col: Column name to use as index
+        :return: Data frame
+        """
+        return ARFF.to_data_frame(self.collect(), index_col)
+
+    def sink(self, file_name):
+        """
+        Executes the scan and writes the rows to an ARFF file (or a CSV file
+        if its name ends with .csv) as they are produced.
+        :param file_name: File name
+        :return: Number of rows written
+        """
+        num_rows = 0
+        with open(file_name, 'wb') as f:
+            if file_name.endswith('.csv'):
+                f.write((u','.join([_csv_quote(unicode(a[0])) for a in self.attributes]) + u'\n').encode('utf-8'))
+            else:
+                _write_header(f, self._empty())
+            for chunk in self._chunks():
+                if file_name.endswith('.csv'):
+                    f.write(_csv_lines(chunk, u'?', True).encode('utf-8'))
+                else:
+                    _write_rows(f, chunk)
+                num_rows += _num_rows(chunk)
+        return num_rows
+
+    def explain(self, analyze=False):
+        """
+        Shows the optimized plan, from the last operation down to the
+        source. If the scan has been executed (or analyze is set, which
+        executes it now) each step shows the number of rows it produced and
+        the time spent in it.
+        :param analyze: Execute the scan first
+        :return: Plan as text
+        """
+        if analyze:
+            for _ in self._chunks():
+                pass
+        reader, operations = self._plan()
+        steps = [reader] + operations
+        lines = []
+        for depth, j in enumerate(reversed(range(len(steps)))):
+            line = '  ' * depth + str(steps[j])
+            if self._stats is not None:
+                rows, seconds = self._stats[j][1]
+                line += '  [rows={}, time={:.1f} ms]'.format(rows, 1000 * seconds)
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def _name(self):
+        if isinstance(self._source, basestring):
+            return self._source
+        return 'data ' + self._relation
+
+    def _empty(self):
+        return _empty(self._relation, self.attributes, self._description)
+
+    def _plan(self):
+        # Move filters as far towards the source as possible. Filters that
+        # reach it are evaluated by the reader.
+        operations = []
+        filters = []
+        for operation in self._operations:
+            if not isinstance(operation, _Filter):
+                operations.append(operation)
+                continue
+            position = len(operations)
+            while position > 0 and operations[position - 1].commutes_with(operation):
+                position -= 1
+            if position == 0:
+                filters.append(operation)
+            else:
+                operations.insert(position, operation)
+
+        # Find the columns the reader has to convert
+        names = None
+        for operation in reversed(operations):
+            names = operation.needed(names)
+        return _Reader(self._name(), self._source, self._source_attributes, names, filters), operations
+
+    def _execute(self, spill_dir, stats):
+        reader, operations = self._plan()
+        stats.append((reader, [0, 0.0]))
+        chunks = reader.run(stats[-1][1])
+        for operation in operations:
+            stats.append((operation, [0, 0.0]))
+            chunks = operation.run(chunks, stats[-1][1], spill_dir)
+        return chunks
+
+    def _chunks(self):
+        spill_dir = tempfile.mkdtemp(prefix='arff-scan-')
+        stats = []
+        try:
+            for chunk in self._execute(spill_dir, stats):
+                yield chunk
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+            self._stats = stats
@@ -30,6 +30,9 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=requirements,
+    entry_points={
+        "console_scripts": ["arff-utils = arff_utils.cli:main"]
+    },
     license="LGPL v3",
     zip_safe=False,
     keywords="arff_utils",
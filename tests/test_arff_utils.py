@@ -9,12 +9,16 @@ Tests for `arff_utils` module.
 """
 
 import os
+import subprocess
+import sys
 import unittest
+import numpy as np
 from arff_utils import ARFF
 
 DIR = os.path.abspath('./tests')
 IN_FILE = DIR + '/data/data.arff'
 OUT_FILE = DIR + '/data/data_out.arff'
+CLI_TIME_BUDGET = 1.0
 
 
 class TestArffUtils(unittest.TestCase):
@@ -27,6 +31,9 @@ class TestArffUtils(unittest.TestCase):
         self._iris  = self._data_dir + '/iris.arff'
         self._labor = self._data_dir + '/labor.arff'
         self._temp  = self._data_dir + '/temp.arff'
+        self._temp2 = self._data_dir + '/temp2.arff'
+        self._temp_binary = self._data_dir + '/temp.arffb'
+        self._temp_csv = self._data_dir + '/temp.csv'
 
     def testIO(self):
         
@@ -73,11 +80,401 @@ class TestArffUtils(unittest.TestCase):
         except:
             pass
 
+    def testReadMany(self):
+
+        # Write iris data as two shards and read them back in parallel
+        data = ARFF.read(self._iris)
+        ARFF.write(self._temp, data)
+        ARFF.write(self._temp2, data)
+        columns = ARFF.read_many([self._temp, self._temp2], workers=2)
+        self.assertEqual(len(columns['columns'][0]), 2 * len(data['data']))
+        self.assertAlmostEqual(columns['columns'][0].sum(), 2 * sum([row[0] for row in data['data']]))
+        data_many = ARFF.read_many(self._data_dir + '/temp*.arff', workers=1, output='dict')
+        self.assertEqual(data_many['data'], data['data'] + data['data'])
+        self.assertRaises(RuntimeError, ARFF.read_many, [])
+
+        # Shared memory of the shards that were read should be released when
+        # another shard cannot be parsed
+        f = open(self._temp2, 'w')
+        f.write(open(self._iris).read().rstrip() + '\nabc,1,1,1,Iris-setosa\n')
+        f.close()
+        blocks = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+        self.assertRaises(Exception, ARFF.read_many, [self._temp, self._temp2, self._temp], workers=3)
+        if os.path.isdir('/dev/shm'):
+            self.assertEqual(set(os.listdir('/dev/shm')) - blocks, set())
+
+        # Shards with different attributes should be rejected
+        ARFF.write(self._temp2, ARFF.read(self._labor))
+        self.assertRaises(RuntimeError, ARFF.read_many, [self._temp, self._temp2])
+
+    def testBinary(self):
+
+        # Round trip labor data (which has missing values) through binary
+        # file with multiple row groups
+        data = ARFF.read(self._labor)
+        ARFF.write_binary(self._temp_binary, data, row_group_size=10)
+        self.assertEqual(ARFF.read_binary(self._temp_binary, output='dict')['data'], data['data'])
+
+        # Read subset of columns and row groups
+        columns = ARFF.read_binary(self._temp_binary, columns=['pension', 'duration'], row_groups=[1])
+        self.assertEqual([attribute[0] for attribute in columns['attributes']], ['pension', 'duration'])
+        self.assertEqual(ARFF.from_columns(columns)['data'], [[row[6], row[0]] for row in data['data'][10:20]])
+        self.assertFalse(columns['columns'][1].flags.writeable)
+
+        # Empty and text files are not binary ARFF files
+        open(self._temp_binary, 'w').close()
+        self.assertRaises(RuntimeError, ARFF.read_binary, self._temp_binary)
+        self.assertRaises(RuntimeError, ARFF.read_binary, self._labor)
+
+        # Integer attributes come back as ints, also when written as ARFF
+        counts = {
+            'relation': 'counts',
+            'description': '',
+            'attributes': [('count', 'INTEGER'), ('weight', 'REAL')],
+            'data': [[1, 1.5], [None, 2.0], [3, None]]
+        }
+        ARFF.write_binary(self._temp_binary, counts)
+        self.assertEqual(ARFF.read_binary(self._temp_binary, output='dict')['data'], counts['data'])
+        ARFF.write(self._temp, ARFF.read_binary(self._temp_binary))
+        self.assertEqual(open(self._temp).read().split('@DATA')[1].split(), ['1,1.5', '?,2.0', '3,?'])
+
+    def testColumns(self):
+
+        # Nominal attributes should be stored as small integer codes
+        data = ARFF.read(self._labor)
+        columns = ARFF.read_columns(self._labor)
+        self.assertEqual(columns['columns'][6].dtype.name, 'int8')
+        self.assertEqual(ARFF.from_columns(columns)['data'], data['data'])
+        data_frame = ARFF.to_data_frame(columns)
+        self.assertEqual(list(data_frame['pension'].cat.categories), ['none', 'ret_allw', 'empl_contr'])
+
+        # Dummy encoding on codes should give the same result as on rows
+        rows, _ = ARFF.dummy_encode(ARFF.read(self._labor), 'pension')
+        columns, _ = ARFF.dummy_encode(columns, 'pension')
+        self.assertEqual(ARFF.from_columns(columns)['data'], rows['data'])
+
+        # Low-cardinality strings can be dictionary-encoded
+        data = {'relation': 'r', 'attributes': [('id', 'STRING'), ('x', 'NUMERIC')],
+                'data': [['a', 1.0], ['b', 2.0], ['a', 3.0], [None, 4.0]], 'description': ''}
+        columns = ARFF.to_columns(data, encode_strings=True)
+        self.assertEqual(columns['dictionaries'][0], ['a', 'b'])
+        self.assertEqual(list(columns['columns'][0]), [0, 1, 0, -1])
+        self.assertEqual(ARFF.from_columns(columns)['data'], data['data'])
+        self.assertIsNone(ARFF.to_columns(data, encode_strings=True, max_dictionary_size=1)['dictionaries'][0])
+
+        # Merge on dictionary-encoded key
+        other = {'relation': 'o', 'attributes': [('id', 'STRING'), ('y', 'NUMERIC')],
+                 'data': [['b', 20.0], ['a', 10.0]], 'description': ''}
+        merged = ARFF.merge(columns, ARFF.to_columns(other, encode_strings=True), 'id', ['y'])
+        self.assertEqual(ARFF.from_columns(merged)['data'], [['a', 1.0, 10.0], ['b', 2.0, 20.0], ['a', 3.0, 10.0]])
+
+    def testDates(self):
+
+        # Write ARFF file with DATE attributes in ISO and custom format
+        f = open(self._temp, 'w')
+        f.write('@relation dates\n'
+                '@attribute id NUMERIC\n'
+                '@attribute "time stamp" date "yyyy-MM-dd HH:mm:ss"\n'
+                '@attribute day date \'dd/MM/yyyy\'\n'
+                '@data\n'
+                '1,\'2015-01-02 03:04:05\',31/12/2014\n'
+                '2,?,?\n')
+        f.close()
+
+        # Dates should be kept as strings in data dictionaries but parsed
+        # to datetime64 in columns and data frames
+        data = ARFF.read(self._temp)
+        self.assertEqual(data['attributes'][1], ('time stamp', 'DATE "yyyy-MM-dd HH:mm:ss"'))
+        self.assertEqual(data['data'][0][1:], ['2015-01-02 03:04:05', '31/12/2014'])
+        columns = ARFF.read_columns(self._temp)
+        self.assertEqual(columns['columns'][2].dtype, np.dtype('datetime64[ns]'))
+        self.assertEqual(str(columns['columns'][2][0])[:10], '2014-12-31')
+        data_frame = ARFF.to_data_frame(data)
+        self.assertEqual(data_frame['time stamp'].dtype, np.dtype('datetime64[ns]'))
+
+        # Dates should round trip through text ARFF
+        ARFF.write(self._temp, columns)
+        self.assertEqual(ARFF.read(self._temp)['data'], data['data'])
+
+        # Dates that do not match the declared format cannot be appended
+        self.assertRaises(RuntimeError, ARFF.append_to_file, self._temp, [[3, '2015-01-02 00:00:00', '2014-12-31']])
+        self.assertRaises(RuntimeError, ARFF.append_to_file, self._temp, [[3, '2015-01-02', '31/12/2014']])
+        self.assertRaises(RuntimeError, ARFF.append_to_file, self._temp, [[3, '2015-01-02 00:00:00Z', '31/12/2014']])
+        self.assertEqual(ARFF.append_to_file(self._temp, [[3, '2015-01-02 00:00:00', '01/01/2015']]), 1)
+
+        # Milliseconds, month names, single-letter fields and time zones
+        f = open(self._temp, 'w')
+        f.write('@relation dates\n'
+                '@attribute stamp date "yyyy-MM-dd HH:mm:ss.SSS"\n'
+                '@attribute day date "d MMMM yyyy H:mm Z"\n'
+                '@data\n'
+                '\'2015-01-02 03:04:05.123\',\'2 January 2015 3:04 +0100\'\n')
+        f.close()
+        columns = ARFF.read_columns(self._temp)
+        self.assertEqual(str(columns['columns'][0][0]), '2015-01-02T03:04:05.123000000')
+        self.assertEqual(str(columns['columns'][1][0]), '2015-01-02T02:04:00.000000000')
+        self.assertEqual(ARFF.from_columns(columns)['data'],
+                         [['2015-01-02 03:04:05.123', '02 January 2015 02:04 +0000']])
+
+        # ISO-8601 time zones are written as Z for UTC, and milliseconds
+        # without exactly three digits are not supported
+        f = open(self._temp, 'w')
+        f.write('@relation dates\n'
+                '@attribute stamp date "yyyy-MM-dd\'T\'HH:mm:ssXXX"\n'
+                '@data\n'
+                '2015-01-02T03:04:05+01:00\n')
+        f.close()
+        self.assertEqual(ARFF.from_columns(ARFF.read_columns(self._temp))['data'], [['2015-01-02T02:04:05Z']])
+        self.assertRaises(RuntimeError, ARFF.to_columns, {
+            'relation': 'r', 'attributes': [('stamp', 'DATE "yyyy-MM-dd HH:mm:ss.S"')],
+            'data': [['2015-01-02 03:04:05.1']], 'description': ''
+        })
+
+    def testAppendToFile(self):
+
+        # Append rows of labor data to a file whose last line does not end
+        # with a newline
+        data = ARFF.read(self._labor)
+        f = open(self._temp, 'w')
+        f.write(open(self._labor).read().rstrip())
+        f.close()
+        self.assertEqual(ARFF.append_to_file(self._temp, data), len(data['data']))
+        self.assertEqual(ARFF.append_to_file(self._temp, [data['data'][0]], fsync=True), 1)
+        self.assertEqual(ARFF.read(self._temp)['data'], data['data'] + data['data'] + [data['data'][0]])
+
+        # Data frames with string columns are appended with their missing
+        # values, and integers (float in the data frame) without decimals
+        names = {
+            'relation': 'names',
+            'attributes': [('name', 'STRING'), ('size', 'NUMERIC'), ('count', 'INTEGER')],
+            'data': [['a', 1.0, 1], [None, 2.0, None], ['c', None, 3]],
+            'description': ''
+        }
+        ARFF.write(self._temp2, names)
+        self.assertEqual(ARFF.append_to_file(self._temp2, ARFF.to_data_frame(ARFF.read(self._temp2))), 3)
+        self.assertEqual(ARFF.read(self._temp2)['data'], names['data'] + names['data'])
+        lines = open(self._temp2).read().split('@DATA')[1].split()
+        self.assertEqual(lines[3:], lines[:3])
+
+        # Appending rows that do not fit the header should fail
+        self.assertRaises(RuntimeError, ARFF.append_to_file, self._temp, ARFF.read(self._iris))
+        self.assertRaises(RuntimeError, ARFF.append_to_file, self._temp, [data['data'][0][:-1]])
+        self.assertRaises(RuntimeError, ARFF.append_to_file, self._temp, [data['data'][0][:-1] + ['great']])
+        self.assertRaises(RuntimeError, ARFF.append_to_file, self._temp, [['abc'] + data['data'][0][1:]])
+        self.assertEqual(ARFF.count(self._temp), 2 * len(data['data']) + 1)
+
+    def testWriteCsv(self):
+
+        # Streaming conversion should give the same CSV file as converting
+        # via a Pandas data frame, both from a file and from a dictionary
+        data = ARFF.read(self._labor)
+        ARFF.to_data_frame(data).to_csv(self._temp_csv, na_rep='?', header=True, index=False, sep=',')
+        expected = open(self._temp_csv).read()
+        ARFF.write_csv(self._temp_csv, self._labor, chunk_size=7)
+        self.assertEqual(open(self._temp_csv).read(), expected)
+        ARFF.write_csv(self._temp_csv, data)
+        self.assertEqual(open(self._temp_csv).read(), expected)
+
+        # Integer attributes are written without a decimal part
+        counts = {
+            'relation': 'counts',
+            'description': '',
+            'attributes': [('count', 'INTEGER'), ('weight', 'REAL')],
+            'data': [[1, 1.5], [None, 2.0], [3, None]]
+        }
+        ARFF.write(self._temp2, counts)
+        ARFF.write_csv(self._temp_csv, self._temp2)
+        self.assertEqual(open(self._temp_csv).read(), 'count,weight\n1,1.5\n?,2.0\n3,?\n')
+
+    def testDescribe(self):
+
+        # Statistics of a file processed in parallel byte ranges should match
+        # those computed from the data in memory
+        data = ARFF.read(self._labor)
+        summary = ARFF.describe(self._labor, workers=3)
+        summary_columns = ARFF.describe(ARFF.read_columns(self._labor))
+        self.assertEqual(summary['pension'], summary_columns['pension'])
+        self.assertAlmostEqual(summary['duration']['variance'], summary_columns['duration']['variance'])
+        values = np.array([row[1] for row in data['data'] if row[1] is not None])
+        self.assertEqual(summary['wage-increase-first-year']['count'], len(values))
+        self.assertEqual(summary['wage-increase-first-year']['missing'], len(data['data']) - len(values))
+        self.assertAlmostEqual(summary['wage-increase-first-year']['mean'], values.mean())
+        self.assertAlmostEqual(summary['wage-increase-first-year']['variance'], values.var(ddof=1))
+        self.assertAlmostEqual(summary['wage-increase-first-year']['quantiles'][0.5], np.median(values))
+        self.assertEqual(summary['class']['counts']['good'], len([row for row in data['data'] if row[-1] == 'good']))
+
+        # Statistics of multiple files should not depend on the number of
+        # workers
+        summaries = [ARFF.describe([self._labor, self._labor], workers=workers) for workers in [1, 4]]
+        self.assertEqual(summaries[0]['duration']['count'], 2 * summary['duration']['count'])
+        self.assertEqual(summaries[0]['duration']['quantiles'], summaries[1]['duration']['quantiles'])
+
+        # Unknown nominal values are counted instead of rejected
+        f = open(self._temp, 'w')
+        f.write(open(self._labor).read().rstrip() + '\n1,5,?,?,?,40,?,?,2,?,11,average,?,?,yes,?,great\n')
+        f.close()
+        summary = ARFF.describe(self._temp, workers=1)
+        self.assertEqual(summary['class']['oov'], 1)
+        self.assertEqual(summary['class']['count'], len(data['data']) + 1)
+        data['data'].append([None] * (len(data['attributes']) - 1) + ['zz'])
+        summary = ARFF.describe(data)
+        self.assertEqual(summary['class']['oov'], 1)
+        self.assertEqual(summary['class']['counts']['good'], summary_columns['class']['counts']['good'])
+
+    def testDropDuplicates(self):
+
+        # Duplicate rows in a shuffled file should be dropped, keeping the
+        # same rows (and fingerprint) as the original data
+        data = ARFF.read(self._labor)
+        rows = data['data'] + data['data'][10:30]
+        rows = [rows[i] for i in np.random.RandomState(0).permutation(len(rows))]
+        ARFF.write(self._temp, dict(data, data=rows))
+        fingerprint = ARFF.fingerprint(self._labor, workers=1)
+        self.assertEqual(ARFF.fingerprint(self._labor, workers=3), fingerprint)
+        self.assertEqual(ARFF.fingerprint(ARFF.read_columns(self._labor, encode_strings=True)), fingerprint)
+        self.assertNotEqual(ARFF.fingerprint(self._temp), fingerprint)
+        result = ARFF.drop_duplicates(self._temp, chunk_size=10)
+        self.assertEqual(len(result['columns'][0]), len(data['data']))
+        self.assertEqual(ARFF.fingerprint(result), fingerprint)
+        self.assertEqual(ARFF.drop_duplicates(self._temp, out_path=self._temp2, verify=True), len(data['data']))
+        self.assertEqual(ARFF.fingerprint(self._temp2), fingerprint)
+
+        # Only the first row of each class is kept
+        result = ARFF.drop_duplicates(data, subset='class', verify=True)
+        self.assertEqual(result['data'], [data['data'][0], data['data'][12]])
+
+    def testSplit(self):
+
+        # Splitting a file should give the same parts as splitting the data
+        # in memory, with each class divided in the given fractions
+        data = ARFF.read(self._labor)
+        parts = ARFF.split(data, [0.7, 0.3], stratify_by='class', seed=1)
+        self.assertEqual(ARFF.split(self._labor, [7, 3], out_paths=[self._temp, self._temp2],
+                                    stratify_by='class', seed=1, workers=2), [40, 17])
+        self.assertEqual(ARFF.read(self._temp)['data'], parts[0]['data'])
+        self.assertEqual(ARFF.read(self._temp2)['data'], parts[1]['data'])
+        self.assertEqual(len([row for row in parts[1]['data'] if row[-1] == 'bad']), 6)
+        self.assertEqual(ARFF.fingerprint(dict(data, data=parts[0]['data'] + parts[1]['data'])),
+                         ARFF.fingerprint(data))
+        self.assertNotEqual(ARFF.split(data, [0.7, 0.3], seed=2)[1]['data'], parts[1]['data'])
+
+        # Samples are in file order and divided over the classes
+        sample = ARFF.from_columns(ARFF.reservoir_sample(self._labor, 10, stratify_by='class', seed=2))
+        self.assertEqual(len(sample['data']), 10)
+        self.assertEqual(len([row for row in sample['data'] if row[-1] == 'bad']), 4)
+        self.assertEqual(sample['data'], [row for row in data['data'] if row in sample['data']])
+        self.assertEqual(ARFF.reservoir_sample(data, 10, stratify_by='class', seed=2)['data'], sample['data'])
+        self.assertEqual(len(ARFF.reservoir_sample(data, 100)['data']), len(data['data']))
+
+    def testScan(self):
+
+        # Filters should be evaluated by the reader, which only converts the
+        # columns that are needed, and give the same rows as the eager steps
+        data = ARFF.read(self._labor)
+        scan = ARFF.scan(self._labor).one_hot('pension').select('duration', 'empl_contr', 'class') \
+            .filter('class', '==', 'good').sort('duration', descending=True).limit(5)
+        plan = scan.explain().splitlines()
+        self.assertEqual(plan[-1].strip(), "SCAN {} COLUMNS [duration, pension, class] FILTER [class == 'good']"
+                         .format(self._labor))
+        result = ARFF.from_columns(scan.collect())
+        expected = [row for row in data['data'] if row[-1] == 'good']
+        expected = sorted(expected, key=lambda row: -1 if row[0] is None else row[0], reverse=True)[:5]
+        self.assertEqual(result['data'], [[row[0], float(row[6] == 'empl_contr'), row[-1]] for row in expected])
+        self.assertTrue('rows=5' in scan.explain().splitlines()[0])
+
+        # Sort and join should give the same results when they spill to disk
+        sort = ARFF.scan(self._labor).sort('wage-increase-first-year')
+        spilled = ARFF.scan(self._labor).sort('wage-increase-first-year', spill_rows=7)
+        self.assertEqual(ARFF.from_columns(sort.collect())['data'], ARFF.from_columns(spilled.collect())['data'])
+        ARFF.write(self._temp, {
+            'relation': 'durations',
+            'attributes': [('duration', 'REAL'), ('label', 'STRING')],
+            'data': [[1.0, 'one'], [2.0, 'two'], [3.0, 'three']],
+            'description': ''
+        })
+        join = ARFF.scan(data).join(self._temp, 'duration', ['label'], spill_rows=2).select('duration', 'label')
+        self.assertEqual(join.sink(self._temp2), len([row for row in data['data'] if row[0] is not None]))
+        self.assertEqual(ARFF.read(self._temp2)['data'][:2], [[1.0, 'one'], [2.0, 'two']])
+
+        # Nominal keys match string keys, and of duplicate keys the last row
+        # is used, also when the string columns are spilled
+        ARFF.write(self._temp, {
+            'relation': 'classes',
+            'attributes': [('class', 'STRING'), ('note', 'STRING')],
+            'data': [['good', 'g1'], ['bad', None], [None, 'x'], ['good', 'g2']],
+            'description': ''
+        })
+        for spill_rows in [10, 1]:
+            join = ARFF.scan(self._labor).join(self._temp, 'class', ['note'], spill_rows=spill_rows)
+            result = ARFF.from_columns(join.select('class', 'note').collect())['data']
+            self.assertEqual(result, [[row[-1], 'g2' if row[-1] == 'good' else None] for row in data['data']])
+
+        # Chained joins and sorts that spill (also in the right-hand scan of
+        # a join) should not overwrite each other's temporary files
+        n = 25000
+        rng = np.random.RandomState(0)
+        ARFF.write(self._temp, {
+            'relation': 'x', 'attributes': [('id', 'NUMERIC'), ('x', 'STRING')],
+            'data': [[float(i), 'x' + str(i)] for i in range(n)], 'description': ''
+        })
+        ARFF.write(self._temp2, {
+            'relation': 'y', 'attributes': [('id', 'NUMERIC'), ('y', 'NUMERIC')],
+            'data': [[float(i), float(-i)] for i in range(n)], 'description': ''
+        })
+        rows = {
+            'relation': 'rows', 'attributes': [('id', 'NUMERIC'), ('v', 'NUMERIC'), ('w', 'NUMERIC')],
+            'columns': [np.arange(n, dtype=np.float64), rng.randint(0, 100, n).astype(np.float64),
+                        rng.randint(0, 100, n).astype(np.float64)],
+            'dictionaries': [None] * 3, 'description': ''
+        }
+        right = ARFF.scan(self._temp2).sort('y', spill_rows=7000)
+        result = ARFF.from_columns(ARFF.scan(rows).join(self._temp, 'id', ['x'], spill_rows=7000)
+                                   .join(right, 'id', ['y'], spill_rows=7000).sort('v', spill_rows=7000)
+                                   .sort('w', spill_rows=7000).collect())['data']
+        expected = sorted(zip(*[column.tolist() for column in rows['columns']]), key=lambda row: (row[2], row[1]))
+        self.assertEqual(result, [[i, v, w, 'x' + str(int(i)), -i] for i, v, w in expected])
+
+    def testCommandLine(self):
+
+        # Header and text commands should not load Numpy or Pandas and
+        # should start within the time budget
+        script = ('import sys, time; start = time.time(); from arff_utils import cli; '
+                  'cli.main(["count", "{}"]); cli.main(["schema", "{}"]); cli.main(["head", "-n", "2", "{}"]); '
+                  'assert "numpy" not in sys.modules and "pandas" not in sys.modules; '
+                  'assert time.time() - start < {}').format(self._labor, self._labor, self._labor, CLI_TIME_BUDGET)
+        output = subprocess.check_output([sys.executable, '-c', script]).decode('utf-8').splitlines()
+        self.assertEqual(output[0], '57')
+        self.assertEqual(output[2], 'duration\tREAL')
+        self.assertEqual(len([line for line in output if line.startswith('1,5,')]), 1)
+
+        # Concatenate and convert files
+        from arff_utils import cli
+        self.assertEqual(cli.main(['concat', self._labor, self._labor, '-o', self._temp]), 0)
+        self.assertEqual(ARFF.count(self._temp), 2 * 57)
+        self.assertEqual(cli.main(['convert', self._temp, self._temp_binary]), 0)
+        self.assertEqual(ARFF.read_binary(self._temp_binary, output='dict')['data'], ARFF.read(self._temp)['data'])
+        self.assertEqual(cli.main(['concat', self._labor, self._iris, '-o', self._temp]), 1)
+
+        # Malformed files give an error message instead of a traceback
+        f = open(self._temp2, 'w')
+        f.write(open(self._labor).read().rstrip() + '\n1,5,?\n')
+        f.close()
+        script = 'import sys; from arff_utils import cli; sys.exit(cli.main(["stats", "{}"]))'.format(self._temp2)
+        process = subprocess.Popen([sys.executable, '-c', script], stderr=subprocess.PIPE)
+        error = process.communicate()[1].decode('utf-8')
+        self.assertEqual(process.returncode, 1)
+        self.assertEqual(error, 'arff-utils: error: Bad @DATA instance format: 1,5,?\n')
+
+        # The output file cannot be one of the inputs
+        self.assertEqual(cli.main(['concat', self._temp, self._labor, '-o', os.path.relpath(self._temp)]), 1)
+        self.assertEqual(ARFF.count(self._temp), 2 * 57)
+
     def tearDown(self):
         
         # Clean up intermediate files
-        if os.path.isfile(self._temp):
-        	os.remove(self._temp)
+        for file_name in [self._temp, self._temp2, self._temp_binary, self._temp_csv]:
+            if os.path.isfile(file_name):
+                os.remove(file_name)
 
 
 if __name__ == '__main__':